@@ -23,19 +23,35 @@ def create_app():
         SECRET_KEY=os.getenv('SECRET_KEY', 'dev-secret-key'),
         SQLALCHEMY_DATABASE_URI=os.getenv('DATABASE_URL', 'sqlite:///stock_ventas.db'),
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        BUSQUEDA_BACKEND=os.getenv('BUSQUEDA_BACKEND', 'memoria'),  # memoria / fts / ilike
+        SQL_INSTRUMENTACION=os.getenv('SQL_INSTRUMENTACION', '1' if app.debug else '0') == '1',  # por defecto solo en debug
+        DB_PERFIL=os.getenv('DB_PERFIL', 'auto'),  # auto / sqlite / mysql / ninguno (services.motor)
+        METRICAS_TOKEN=os.getenv('METRICAS_TOKEN'),  # si se define, /metrics pide 'Authorization: Bearer <token>'
         FLASK_ENV=os.getenv('FLASK_ENV', 'development')
     )
+    # Réplica de solo lectura para listados y reportes (services.replica)
+    if os.getenv('DATABASE_REPLICA_URL'):
+        app.config['SQLALCHEMY_BINDS'] = {'replica': os.getenv('DATABASE_REPLICA_URL')}
     
     # Inicializar extensiones
+    from services import motor
+    motor.configurar(app)
     db.init_app(app)
+    motor.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
+    
+    from services import busqueda, busqueda_fts, instrumentacion, monitoreo
+    busqueda.init_app(app)
+    busqueda_fts.init_app(app)
+    instrumentacion.init_app(app)
+    monitoreo.init_app(app)
 
     @login_manager.user_loader
     def load_user(user_id):
-        from models import Usuario  # Import aquí para evitar circular imports
-        return Usuario.query.get(int(user_id))
+        from services.usuarios import cargar_usuario  # Import aquí para evitar circular imports
+        return cargar_usuario(int(user_id))
     
     # Registrar blueprints (importación correcta para la opción A)
     from routes.auth import bp as auth_bp
@@ -93,6 +109,9 @@ def create_app():
         db.session.commit()
         print("Base de datos inicializada con éxito.")
     
+    from comandos import registrar_comandos
+    registrar_comandos(app)
+    
     return app
 
 if __name__ == '__main__':
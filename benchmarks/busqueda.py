@@ -0,0 +1,108 @@
+"""Compara los motores de /buscar_productos sobre un catálogo sintético.
+
+Uso: python -m benchmarks.busqueda [--variantes 100000] [--repeticiones 20]
+
+Crea una base SQLite temporal, genera el catálogo con inserciones masivas y mide
+la consulta ILIKE original, el índice en memoria y la tabla FTS5.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+TALLES = ['XS', 'S', 'M', 'L', 'XL', 'XXL']
+CLUBES = ['Boca', 'River', 'Racing', 'Independiente', 'San Lorenzo', 'Huracán',
+          'Vélez', 'Estudiantes', 'Gimnasia', 'Newells', 'Rosario Central', 'Talleres']
+TERMINOS = ['boc', 'river', 'camiseta', 'CAM-00012', 'lorenzo', 'xl', 'alternativa 2024', 'zzz']
+
+
+def _poblar(db, variantes):
+    from sqlalchemy import insert
+    from models import Club, Categoria, Producto, Variante
+
+    db.session.execute(insert(Club), [{'nombre': n} for n in CLUBES])
+    db.session.execute(insert(Categoria), [{'nombre': 'Camisetas'}])
+    productos = variantes // len(TALLES) + 1
+    db.session.execute(insert(Producto), [
+        {'nombre': f"Camiseta {'Titular' if i % 2 else 'Alternativa'} {CLUBES[i % len(CLUBES)]} {2000 + i % 25}",
+         'club_id': i % len(CLUBES) + 1, 'categoria_id': 1,
+         'temporada': str(2000 + i % 25), 'precio': 100}
+        for i in range(productos)
+    ])
+    filas = []
+    for i in range(variantes):
+        producto, talle = divmod(i, len(TALLES))
+        filas.append({'producto_id': producto + 1, 'talle': TALLES[talle],
+                      'sku': f'CAM-{producto:05d}-{TALLES[talle]}', 'precio': 100,
+                      'stock': i % 7, 'stock_minimo': 2})
+    for desde in range(0, len(filas), 10000):
+        db.session.execute(insert(Variante), filas[desde:desde + 10000])
+    db.session.commit()
+
+
+def _medir(funcion, repeticiones):
+    tiempos = {}
+    for termino in TERMINOS:
+        funcion(termino)  # primera llamada fuera de la medición
+        muestras = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion(termino)
+            muestras.append((time.perf_counter() - inicio) * 1000)
+        tiempos[termino] = muestras
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--variantes', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    fd, ruta = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + ruta
+    try:
+        from app import create_app, db
+        from services import busqueda_fts
+        from services.busqueda import IndiceBusqueda
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            inicio = time.perf_counter()
+            _poblar(db, args.variantes)
+            print(f'Catálogo de {args.variantes} variantes generado en {time.perf_counter() - inicio:.1f}s')
+
+            inicio = time.perf_counter()
+            with db.engine.begin() as conexion:
+                busqueda_fts.crear_tabla(conexion)
+                busqueda_fts.sincronizar(conexion, completo=True)
+            print(f'Tabla FTS5 construida en {time.perf_counter() - inicio:.1f}s')
+
+            indice = IndiceBusqueda()
+            inicio = time.perf_counter()
+            indice.reconstruir()
+            print(f'Índice en memoria construido en {time.perf_counter() - inicio:.1f}s\n')
+
+            motores = {
+                'ilike': busqueda_fts.buscar_ilike,
+                'memoria': indice.buscar,
+                'fts': busqueda_fts.buscar,
+            }
+            print(f"{'término':<20}" + ''.join(f'{m + " p50":>14}{m + " p95":>14}' for m in motores))
+            resultados = {nombre: _medir(funcion, args.repeticiones) for nombre, funcion in motores.items()}
+            for termino in TERMINOS:
+                linea = f'{termino:<20}'
+                for nombre in motores:
+                    muestras = sorted(resultados[nombre][termino])
+                    p95 = muestras[min(len(muestras) - 1, int(len(muestras) * 0.95))]
+                    linea += f'{statistics.median(muestras):>13.2f}ms{p95:>12.2f}ms'
+                print(linea)
+    finally:
+        os.remove(ruta)
+
+
+if __name__ == '__main__':
+    main()
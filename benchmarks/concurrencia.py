@@ -0,0 +1,294 @@
+"""Carga concurrente de ventas y ajustes de stock con verificación de invariantes.
+
+Uso: python -m benchmarks.concurrencia [--modo hilos|procesos] [--trabajadores 8]
+     [--pedidos 100] [--wal ambos|si|no]
+
+Cada trabajador inicia sesión y envía pedidos a ventas.nueva y stock.ajustar
+sobre unas pocas variantes con poco stock, todos contra la misma base SQLite.
+A mitad de camino cada uno pide además un cierre de caja (caja.cerrar), así el
+saldo final se calcula desde un punto de control más los movimientos
+posteriores.
+Un pedido que falla por "database is locked" se reintenta, como haría el
+cajero. Se informa el rendimiento, la latencia, las esperas de escritura y
+los reintentos, y al final se verifica que:
+
+- ninguna variante quede con stock negativo,
+- Variante.stock coincida con el libro de movimientos (services.conciliacion),
+- cada cierre de caja coincida con la suma de los movimientos que consolida,
+- el saldo de la caja (services.caja.saldo_caja; Caja.saldo es histórico)
+  coincida con la suma de MovimientoCaja, y cada venta con su ingreso e items.
+
+Termina con código 1 si algún invariante no se cumple.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+
+PROPORCION_AJUSTES = 0.2
+
+_local = threading.local()
+
+
+def _registrar_eventos(engine):
+    """Mide las escrituras (incluida la espera por el lock) y marca los errores de bloqueo"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _antes(conexion, cursor, sentencia, parametros, contexto, executemany):
+        conexion.info['inicio_escritura'] = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _despues(conexion, cursor, sentencia, parametros, contexto, executemany):
+        inicio = conexion.info.pop('inicio_escritura', None)
+        escrituras = getattr(_local, 'escrituras', None)
+        if inicio is not None and escrituras is not None and not sentencia.lstrip().upper().startswith('SELECT'):
+            escrituras.append((time.perf_counter() - inicio) * 1000)
+
+    @event.listens_for(engine, 'handle_error')
+    def _error(contexto):
+        if 'locked' in str(contexto.original_exception):
+            _local.bloqueado = True
+
+
+def _crear_app():
+    from app import create_app, db
+
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False)
+    with app.app_context():
+        _registrar_eventos(db.engine)
+    return app
+
+
+def _preparar(db, variantes, stock):
+    from models import Club, Categoria, Producto, Variante, Usuario
+    from services.caja import obtener_caja
+    from services.stock import registrar_movimiento
+
+    club, categoria = Club(nombre='Boca'), Categoria(nombre='Camisetas')
+    usuario = Usuario(username='carga', nombre='Carga', email='carga@tienda.com', rol='admin')
+    usuario.set_password('carga123')
+    db.session.add_all([club, categoria, usuario])
+    db.session.flush()
+    obtener_caja()
+    producto = Producto(nombre='Camiseta Boca', club_id=club.id, categoria_id=categoria.id,
+                        temporada='2025', precio=100)
+    db.session.add(producto)
+    db.session.flush()
+    ids = []
+    for i in range(variantes):
+        variante = Variante(producto_id=producto.id, talle=str(i), sku=f'CARGA-{i}',
+                            precio=100 + i, stock=0, stock_minimo=2)
+        db.session.add(variante)
+        db.session.flush()
+        # El stock inicial entra por el libro para que la conciliación cierre
+        registrar_movimiento(variante.id, 'entrada', stock, 'Stock inicial', 'carga')
+        ids.append(variante.id)
+    db.session.commit()
+    return ids
+
+
+def _pedido(rnd, variantes):
+    if rnd.random() < PROPORCION_AJUSTES:
+        variante = rnd.choice(variantes)
+        tipo = rnd.choice(('entrada', 'salida'))
+        return 'ajuste', f'/stock/ajustar/{variante}', {
+            'cantidad': str(rnd.randint(1, 3)), 'tipo': tipo, 'motivo': 'Carga concurrente'
+        }
+    items = [f'{v}_{rnd.randint(1, 2)}' for v in rnd.sample(variantes, rnd.randint(1, 3))]
+    return 'venta', '/ventas/nueva', {'items[]': items, 'cliente_id': '0'}
+
+
+def _resultado(tipo, respuesta):
+    """exito, rechazo (sin stock) o error, según la respuesta de la ruta"""
+    if respuesta.status_code >= 500:
+        return 'error'
+    destino = respuesta.headers.get('Location', '')
+    if tipo == 'cierre':
+        return 'exito' if destino.rstrip('/').endswith('/caja') else 'rechazo'
+    if tipo == 'venta':
+        return 'exito' if respuesta.status_code == 302 and '/ventas/' in destino else 'rechazo'
+    return 'exito' if destino.rstrip('/').endswith('/stock') else 'rechazo'
+
+
+def _trabajar(app, indice, pedidos, variantes, reintentos):
+    _local.escrituras = []
+    rnd = random.Random(indice)
+    cliente = app.test_client()
+    cliente.post('/login', data={'email': 'carga@tienda.com', 'password': 'carga123'})
+
+    conteo = {'exito': 0, 'rechazo': 0, 'error': 0, 'reintentos': 0, 'bloqueos': 0}
+    latencias = []
+    # Reloj de pared: comparable entre procesos, sin contar el arranque de cada uno
+    comienzo = time.time()
+    for numero in range(pedidos):
+        if numero == pedidos // 2:
+            tipo, url, datos = 'cierre', '/caja/cierre', {}
+        else:
+            tipo, url, datos = _pedido(rnd, variantes)
+        for intento in range(reintentos + 1):
+            _local.bloqueado = False
+            inicio = time.perf_counter()
+            respuesta = cliente.post(url, data=datos)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            resultado = _resultado(tipo, respuesta)
+            if resultado == 'error' and _local.bloqueado:
+                conteo['bloqueos'] += 1
+                if intento < reintentos:
+                    conteo['reintentos'] += 1
+                    continue
+            break
+        conteo[resultado] += 1
+    return conteo, latencias, _local.escrituras, (comienzo, time.time())
+
+
+def _trabajar_en_proceso(indice, pedidos, variantes, reintentos):
+    return _trabajar(_crear_app(), indice, pedidos, variantes, reintentos)
+
+
+def _verificar(db):
+    """Lista de invariantes que no se cumplen"""
+    from sqlalchemy import case, func, select
+    from models import Caja, CierreCaja, MovimientoCaja, Variante, Venta, VentaItem
+    from services.caja import saldo_caja
+    from services.conciliacion import conciliar
+
+    fallas = []
+    negativas = db.session.execute(select(func.count()).where(Variante.stock < 0)).scalar()
+    if negativas:
+        fallas.append(f'{negativas} variantes con stock negativo')
+
+    diferencias = conciliar()
+    if diferencias:
+        fallas.append(f'{len(diferencias)} variantes no coinciden con el libro: {diferencias[:3]}')
+
+    caja = db.session.execute(select(Caja)).scalar()
+    firmado = case((MovimientoCaja.tipo == 'ingreso', MovimientoCaja.monto), else_=-MovimientoCaja.monto)
+    suma = select(func.coalesce(func.sum(firmado), 0)).where(MovimientoCaja.caja_id == caja.id)
+
+    # Sin cierres saldo_caja sería la misma suma de abajo y la comparación no probaría nada
+    cierres = db.session.execute(
+        select(CierreCaja.ultimo_movimiento_id, CierreCaja.saldo).where(CierreCaja.caja_id == caja.id)
+    ).all()
+    if not cierres:
+        fallas.append('ningún cierre de caja: no se verificó el saldo desde un punto de control')
+    for hasta_id, saldo_cierre in cierres:
+        consolidado = db.session.execute(suma.where(MovimientoCaja.id <= hasta_id)).scalar()
+        if abs(saldo_cierre - consolidado) > 0.005:
+            fallas.append(f'cierre hasta el movimiento {hasta_id} con saldo {saldo_cierre:.2f}, '
+                          f'los movimientos suman {consolidado:.2f}')
+
+    suma = db.session.execute(suma).scalar()
+    saldo = saldo_caja(caja.id)
+    if abs(saldo - suma) > 0.005:
+        fallas.append(f'saldo de caja {saldo:.2f} distinto de la suma de movimientos {suma:.2f}')
+
+    sin_ingreso = db.session.execute(
+        select(func.count(Venta.id))
+        .outerjoin(MovimientoCaja, Venta.movimiento_caja_id == MovimientoCaja.id)
+        .where(func.coalesce(MovimientoCaja.monto, -1) != Venta.total)
+    ).scalar()
+    if sin_ingreso:
+        fallas.append(f'{sin_ingreso} ventas sin un ingreso de caja por su total')
+
+    items = select(VentaItem.venta_id, func.sum(VentaItem.subtotal).label('suma'))\
+        .group_by(VentaItem.venta_id).subquery()
+    descuadradas = db.session.execute(
+        select(func.count(Venta.id)).outerjoin(items, items.c.venta_id == Venta.id)
+        .where(func.abs(func.coalesce(items.c.suma, 0) - Venta.total) > 0.005)
+    ).scalar()
+    if descuadradas:
+        fallas.append(f'{descuadradas} ventas cuyo total no coincide con sus items')
+    return fallas
+
+
+def _percentil(valores, n=20):
+    return statistics.quantiles(valores, n=n)[-1] if len(valores) > 1 else (valores or [0])[0]
+
+
+def _correr(args, wal):
+    fd, ruta = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + ruta
+    # Sin perfil del motor (services.motor): el modo del journal lo fija esta prueba
+    os.environ['DB_PERFIL'] = 'ninguno'
+    try:
+        from app import db
+
+        app = _crear_app()
+        with app.app_context():
+            db.create_all()
+            variantes = _preparar(db, args.variantes, args.stock)
+            # journal_mode queda guardado en el archivo: vale para todas las conexiones
+            with db.engine.connect() as conexion:
+                conexion.exec_driver_sql(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+            db.engine.dispose()
+
+        if args.modo == 'hilos':
+            with ThreadPoolExecutor(args.trabajadores) as ejecutor:
+                futuros = [ejecutor.submit(_trabajar, app, i, args.pedidos, variantes, args.reintentos)
+                           for i in range(args.trabajadores)]
+        else:
+            with ProcessPoolExecutor(args.trabajadores, mp_context=get_context('spawn')) as ejecutor:
+                futuros = [ejecutor.submit(_trabajar_en_proceso, i, args.pedidos, variantes, args.reintentos)
+                           for i in range(args.trabajadores)]
+        resultados = [f.result() for f in futuros]
+        duracion = max(r[3][1] for r in resultados) - min(r[3][0] for r in resultados)
+
+        with app.app_context():
+            fallas = _verificar(db)
+            db.session.rollback()
+            db.engine.dispose()
+    finally:
+        for sufijo in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(ruta + sufijo):
+                os.remove(ruta + sufijo)
+
+    conteo = {clave: sum(r[0][clave] for r in resultados) for clave in resultados[0][0]}
+    latencias = [l for r in resultados for l in r[1]]
+    escrituras = [e for r in resultados for e in r[2]]
+
+    print(f"\nWAL {'activado' if wal else 'desactivado'} ({args.modo}, {args.trabajadores} trabajadores)")
+    print(f"  pedidos/s: {sum(conteo[c] for c in ('exito', 'rechazo', 'error')) / duracion:.1f} "
+          f"({conteo['exito']} aplicados, {conteo['rechazo']} rechazados por stock, {conteo['error']} errores)")
+    print(f"  latencia ms: p50 {statistics.median(latencias):.1f}  p95 {_percentil(latencias):.1f}  "
+          f"máx {max(latencias):.1f}")
+    if escrituras:
+        print(f"  escrituras ms (incluye espera de lock): p50 {statistics.median(escrituras):.2f}  "
+              f"p99 {_percentil(escrituras, 100):.1f}  máx {max(escrituras):.1f}")
+    print(f"  bloqueos: {conteo['bloqueos']}  reintentos: {conteo['reintentos']}")
+    for falla in fallas:
+        print(f'  INVARIANTE {falla}')
+    if not fallas:
+        print('  invariantes: ok')
+    return fallas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modo', choices=('hilos', 'procesos'), default='hilos')
+    parser.add_argument('--trabajadores', type=int, default=8)
+    parser.add_argument('--pedidos', type=int, default=100, help='Pedidos por trabajador')
+    parser.add_argument('--variantes', type=int, default=5, help='Variantes en disputa')
+    parser.add_argument('--stock', type=int, default=200,
+                        help='Stock inicial de cada variante: al agotarse se prueba que no haya sobreventa')
+    parser.add_argument('--reintentos', type=int, default=3,
+                        help='Reintentos de un pedido que falla por "database is locked"')
+    parser.add_argument('--wal', choices=('ambos', 'si', 'no'), default='ambos')
+    args = parser.parse_args()
+
+    modos = {'ambos': (False, True), 'si': (True,), 'no': (False,)}[args.wal]
+    fallas = [falla for wal in modos for falla in _correr(args, wal)]
+    if fallas:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
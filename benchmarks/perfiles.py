@@ -0,0 +1,100 @@
+"""Compara los perfiles del motor (services.motor) sobre el camino de la venta.
+
+Uso: python -m benchmarks.perfiles [--trabajadores 8] [--pedidos 100] [--url URL]
+
+Para cada perfil crea una base nueva, carga unas pocas variantes y envía
+ventas y ajustes de stock con el cliente de pruebas de Flask: primero un
+solo cajero (latencia) y después varios en paralelo (rendimiento y
+bloqueos). Sin --url compara 'ninguno' y 'sqlite' sobre archivos SQLite
+temporales. Con --url (una base MySQL descartable: se borran y recrean
+todas las tablas) compara 'ninguno' y 'mysql'.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.concurrencia import _crear_app, _percentil, _preparar, _trabajar, _verificar
+
+# Stock suficiente para que ninguna venta se rechace: se mide el camino completo
+STOCK = 1000000
+
+
+def _resumen(resultados):
+    latencias = [l for r in resultados for l in r[1]]
+    pedidos = sum(r[0][c] for r in resultados for c in ('exito', 'rechazo', 'error'))
+    duracion = max(r[3][1] for r in resultados) - min(r[3][0] for r in resultados)
+    return {
+        'p50': statistics.median(latencias),
+        'p95': _percentil(latencias),
+        'por_segundo': pedidos / duracion,
+        'errores': sum(r[0]['error'] for r in resultados),
+        'bloqueos': sum(r[0]['bloqueos'] for r in resultados),
+    }
+
+
+def _medir(perfil, url, args):
+    from app import db
+
+    os.environ['DATABASE_URL'] = url
+    os.environ['DB_PERFIL'] = perfil
+    app = _crear_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        variantes = _preparar(db, args.variantes, STOCK)
+
+    secuencial = _resumen([_trabajar(app, 0, args.pedidos, variantes, args.reintentos)])
+    with ThreadPoolExecutor(args.trabajadores) as ejecutor:
+        futuros = [ejecutor.submit(_trabajar, app, i, args.pedidos, variantes, args.reintentos)
+                   for i in range(1, args.trabajadores + 1)]
+    concurrente = _resumen([f.result() for f in futuros])
+
+    with app.app_context():
+        fallas = _verificar(db)
+        db.session.rollback()
+        if args.url:
+            db.drop_all()
+        db.engine.dispose()
+    return secuencial, concurrente, fallas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trabajadores', type=int, default=8)
+    parser.add_argument('--pedidos', type=int, default=100, help='Pedidos por cajero')
+    parser.add_argument('--variantes', type=int, default=20)
+    parser.add_argument('--reintentos', type=int, default=0,
+                        help='Reintentos ante "database is locked" (0: se cuentan como error)')
+    parser.add_argument('--url', help='Base MySQL descartable para comparar el perfil mysql')
+    args = parser.parse_args()
+
+    perfiles = ('ninguno', 'mysql') if args.url else ('ninguno', 'sqlite')
+    resultados = {}
+    for perfil in perfiles:
+        if args.url:
+            resultados[perfil] = _medir(perfil, args.url, args)
+            continue
+        fd, ruta = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            resultados[perfil] = _medir(perfil, 'sqlite:///' + ruta, args)
+        finally:
+            for sufijo in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(ruta + sufijo):
+                    os.remove(ruta + sufijo)
+
+    print(f"\n{'':<10}{'1 cajero':^30}{f'{args.trabajadores} cajeros':^44}")
+    print(f"{'perfil':<10}{'p50 ms':>10}{'p95 ms':>10}{'ped/s':>10}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'ped/s':>10}{'errores':>14}")
+    for perfil, (secuencial, concurrente, fallas) in resultados.items():
+        print(f"{perfil:<10}{secuencial['p50']:>10.1f}{secuencial['p95']:>10.1f}{secuencial['por_segundo']:>10.1f}"
+              f"{concurrente['p50']:>10.1f}{concurrente['p95']:>10.1f}{concurrente['por_segundo']:>10.1f}"
+              f"{concurrente['errores']:>14}")
+        for falla in fallas:
+            print(f'  INVARIANTE {falla}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Consultas que deben usar índices, para tests/test_planes.py.
+
+Uso: python -m pytest tests/test_planes.py
+
+Cada entrada de CONSULTAS es una pantalla (listado, exportación o reporte)
+con las tablas grandes que puede recorrer enteras. _preparar carga los datos
+mínimos sobre una base ya migrada y _escaneos analiza con EXPLAIN QUERY PLAN
+una sentencia capturada.
+"""
+import os
+import re
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tablas de referencia chicas que se listan completas en los filtros
+TABLAS_CHICAS = {'clubes', 'categorias', 'cajas', 'usuarios', 'proveedores'}
+
+# (nombre, url, tablas que esa pantalla puede recorrer y por qué)
+CONSULTAS = [
+    ('dashboard', '/dashboard', {
+        # productos_bajo_stock compara dos columnas de la misma fila: ningún
+        # índice lo resuelve; el valor queda cacheado en services.metricas
+        'variantes',
+    }),
+    ('ventas', '/ventas/', set()),
+    ('ventas por fecha', '/ventas/?fecha_desde=2024-01-01&fecha_hasta=2024-12-31', set()),
+    ('ventas por cliente', '/ventas/?cliente_id=1', set()),
+    ('ventas por tipo', '/ventas/?tipo_venta=fisica', set()),
+    ('ventas página 2', '/ventas/?despues=2030-01-01T00:00:00_100', set()),
+    ('ventas exportación', '/ventas/exportar?fecha_desde=2024-01-01', set()),
+    ('ventas resumen', '/ventas/resumen', set()),
+    ('detalle de venta', '/ventas/1', set()),
+    ('caja', '/caja/', set()),
+    ('movimientos de caja', '/caja/movimientos?fecha_desde=2024-01-01&tipo=ingreso', set()),
+    ('movimientos de caja exportación', '/caja/movimientos/exportar', set()),
+    ('movimientos de stock', '/stock/movimientos', set()),
+    ('movimientos de stock por producto', '/stock/movimientos?producto_id=1&fecha_desde=2024-01-01', set()),
+    ('movimientos de stock exportación', '/stock/movimientos/exportar?tipo=entrada', set()),
+    ('stock', '/stock/', set()),
+    ('stock por club', '/stock/?club_id=1&orden=stock', set()),
+    ('stock por categoría', '/stock/?categoria_id=1&orden=sku&dir=desc', set()),
+    ('productos', '/productos/', {
+        # la lista de talles para el filtro es un DISTINCT sobre todo el índice de talles
+        'variantes',
+    }),
+    ('productos filtrados', '/productos/?club=1&temporada=2024&categoria=1', {'variantes'}),
+    ('productos por talle', '/productos/?talle=M', {'variantes'}),
+    ('catálogo exportación', '/productos/exportar?club=1', set()),
+    ('stock por SKU', '/stock?skus=BOC-S,BOC-M', set()),
+    ('búsqueda de clientes', '/buscar_clientes?q=jua', set()),
+    ('búsqueda de clientes por email', '/buscar_clientes?q=juan@mail', set()),
+    ('búsqueda de clientes por teléfono', '/buscar_clientes?q=11-4444', set()),
+]
+
+_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def _preparar(db):
+    from models import Club, Categoria, Producto, Variante, Cliente, Caja, Usuario
+    from services.ventas import registrar_venta
+
+    club, categoria = Club(nombre='Boca'), Categoria(nombre='Camisetas')
+    usuario = Usuario(username='planes', nombre='Planes', email='planes@tienda.com', rol='admin')
+    usuario.set_password('planes123')
+    db.session.add_all([club, categoria, usuario, Caja(nombre='Caja Principal', saldo=0),
+                        Cliente(nombre='Juan', email='Juan@Mail.com', telefono='11-4444-5555')])
+    db.session.flush()
+    producto = Producto(nombre='Camiseta Boca', club_id=club.id, categoria_id=categoria.id,
+                        temporada='2024', precio=100)
+    db.session.add(producto)
+    db.session.flush()
+    for talle in ('S', 'M'):
+        db.session.add(Variante(producto_id=producto.id, talle=talle, sku=f'BOC-{talle}',
+                                precio=100, stock=10, stock_minimo=2))
+    db.session.flush()
+    registrar_venta(['1_1'], cliente_id=1, usuario='planes')
+    db.session.commit()
+
+
+def _escaneos(conexion, sentencia, parametros, tablas):
+    filas = conexion.exec_driver_sql('EXPLAIN QUERY PLAN ' + sentencia, parametros).all()
+    encontrados = []
+    for fila in filas:
+        coincidencia = _SCAN.match(fila[-1])
+        if coincidencia:
+            # SQLAlchemy nombra los alias como tabla_1
+            tabla = re.sub(r'_\d+$', '', coincidencia.group(1))
+            if tabla in tablas:
+                encontrados.append((tabla, [f[-1] for f in filas]))
+    return encontrados
+
@@ -0,0 +1,203 @@
+"""Mide las rutas principales y las compara con la línea base guardada.
+
+Uso: python -m benchmarks.rutas [--escala chica|mediana] [--repeticiones 50] [--actualizar]
+
+Genera con services.generador un conjunto de datos de tamaño fijo en una base
+SQLite temporal, inicia sesión y recorre cada escenario con el cliente de
+pruebas de Flask. Registra p50/p95 en milisegundos, consultas SQL por pedido
+y memoria pico, y los compara con benchmarks/linea_base.json: termina con
+código 1 si algún valor supera la tolerancia. --actualizar reescribe la línea
+base de la escala medida (los tiempos dependen de la máquina: conviene
+regenerarla en la misma donde se compara).
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'linea_base.json')
+
+# Parámetros de services.generador.generar para cada escala
+ESCALAS = {
+    'chica': {'clubes': 8, 'anios': 1, 'productos_por_temporada': 4, 'clientes': 500, 'ventas': 5000},
+    'mediana': {'clubes': 28, 'anios': 3, 'productos_por_temporada': 6, 'clientes': 5000, 'ventas': 100000},
+}
+HASTA = datetime(2025, 6, 30)
+
+# Diferencias por debajo de estos márgenes se consideran ruido
+MARGEN_MS = 2.0
+MARGEN_KB = 64
+
+
+def _escenarios(variantes):
+    """(nombre, método, url, función que arma los datos del pedido, código esperado)"""
+    # Cada unidad en stock se vende una sola vez, repartidas entre variantes:
+    # ningún item se rechaza (las advertencias se acumularían en la sesión)
+    unidades = [variante_id for ronda in range(max(stock for _, stock in variantes))
+                for variante_id, stock in variantes if stock > ronda]
+    ciclo = iter(unidades)
+
+    def _venta(lineas):
+        # La latencia y las consultas no deberían crecer con el tamaño del carrito
+        return lambda: {'items[]': [f'{next(ciclo)}_1' for _ in range(lineas)], 'cliente_id': '0'}
+
+    return [
+        ('auth.dashboard', 'get', '/dashboard', None, 200),
+        ('ventas.nueva GET', 'get', '/ventas/nueva', None, 200),
+        ('ventas.nueva POST', 'post', '/ventas/nueva', _venta(2), 302),
+        ('ventas.nueva POST 15 items', 'post', '/ventas/nueva', _venta(15), 302),
+        ('api.buscar_productos', 'get', '/buscar_productos?q=boca', None, 200),
+        ('api.buscar_productos sku', 'get', '/buscar_productos?q=001-1', None, 200),
+        ('stock.gestion', 'get', '/stock/', None, 200),
+        ('stock.gestion filtrada', 'get', '/stock/?club_id=1&stock_bajo=true&orden=stock', None, 200),
+    ]
+
+
+def _preparar(db, escala):
+    from sqlalchemy import select
+    from models import Usuario, Variante
+    from services.generador import generar
+    from services.resumen import reconstruir
+
+    generar(hasta=HASTA, **ESCALAS[escala])
+    reconstruir()
+    usuario = Usuario(username='bench', nombre='Bench', email='bench@tienda.com', rol='admin')
+    usuario.set_password('bench123')
+    db.session.add(usuario)
+    db.session.commit()
+    return db.session.execute(
+        select(Variante.id, Variante.stock).where(Variante.stock > 0).order_by(Variante.id)
+    ).all()
+
+
+def _pedir(cliente, metodo, url, datos, esperado):
+    respuesta = getattr(cliente, metodo)(url, data=datos() if datos else None)
+    respuesta.get_data()
+    if respuesta.status_code != esperado:
+        raise RuntimeError(f'{metodo.upper()} {url} respondió {respuesta.status_code}')
+    return respuesta
+
+
+def _medir(cliente, metodo, url, datos, esperado, repeticiones):
+    _pedir(cliente, metodo, url, datos, esperado)  # primera llamada fuera de la medición
+    gc.collect()
+
+    tiempos, consultas = [], []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        respuesta = _pedir(cliente, metodo, url, datos, esperado)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(int(respuesta.headers.get('X-SQL-Consultas', 0)))
+
+    # La memoria se mide aparte: tracemalloc hace más lento cada pedido
+    tracemalloc.start()
+    try:
+        _pedir(cliente, metodo, url, datos, esperado)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(statistics.median(tiempos), 2),
+        'p95_ms': round(statistics.quantiles(tiempos, n=20)[-1], 2),
+        'consultas': max(consultas),
+        'memoria_kb': round(pico / 1024),
+    }
+
+
+def _comparar(actual, base, tolerancias):
+    """Lista de regresiones de un escenario respecto de su línea base"""
+    regresiones = []
+    for clave in ('p50_ms', 'p95_ms'):
+        limite = base[clave] * (1 + tolerancias[clave])
+        if actual[clave] > limite and actual[clave] - base[clave] > MARGEN_MS:
+            regresiones.append(f'{clave} {actual[clave]} > {limite:.2f}')
+    # La cantidad de consultas es determinista: cualquier aumento es una regresión
+    if actual['consultas'] > base['consultas']:
+        regresiones.append(f"consultas {actual['consultas']} > {base['consultas']}")
+    limite = base['memoria_kb'] * (1 + tolerancias['memoria_kb'])
+    if actual['memoria_kb'] > limite and actual['memoria_kb'] - base['memoria_kb'] > MARGEN_KB:
+        regresiones.append(f"memoria_kb {actual['memoria_kb']} > {limite:.0f}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escala', choices=ESCALAS, default='chica')
+    parser.add_argument('--repeticiones', type=int, default=50)
+    parser.add_argument('--tolerancia-p50', type=float, default=0.5,
+                        help='Aumento admitido en p50 (0.5 = 50%%)')
+    parser.add_argument('--tolerancia-p95', type=float, default=1.0,
+                        help='Aumento admitido en p95, más ruidoso que la mediana')
+    parser.add_argument('--tolerancia-memoria', type=float, default=0.25,
+                        help='Aumento admitido en la memoria pico (0.25 = 25%%)')
+    parser.add_argument('--actualizar', action='store_true', help='Guardar los resultados como línea base')
+    args = parser.parse_args()
+    tolerancias = {'p50_ms': args.tolerancia_p50, 'p95_ms': args.tolerancia_p95,
+                   'memoria_kb': args.tolerancia_memoria}
+
+    fd, ruta = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + ruta
+    os.environ['SQL_INSTRUMENTACION'] = '1'  # cuenta las consultas (X-SQL-Consultas)
+    try:
+        from flask_migrate import upgrade
+        from app import create_app, db
+
+        app = create_app()
+        app.config.update(WTF_CSRF_ENABLED=False, SQL_CABECERAS=True)
+        with app.app_context():
+            upgrade(directory=os.path.join(RAIZ, 'migrations'))
+            print(f"Generando datos (escala {args.escala})...")
+            variantes = _preparar(db, args.escala)
+
+            cliente = app.test_client()
+            cliente.post('/login', data={'email': 'bench@tienda.com', 'password': 'bench123'})
+
+            resultados = {}
+            for nombre, metodo, url, datos, esperado in _escenarios(variantes):
+                resultados[nombre] = _medir(cliente, metodo, url, datos, esperado, args.repeticiones)
+    finally:
+        os.remove(ruta)
+
+    lineas_base = {}
+    if os.path.exists(LINEA_BASE):
+        with open(LINEA_BASE, encoding='utf-8') as archivo:
+            lineas_base = json.load(archivo)
+    base = lineas_base.get(args.escala, {})
+
+    print(f"\n{'escenario':<28}{'p50 ms':>9}{'p95 ms':>9}{'consultas':>11}{'memoria KB':>12}")
+    regresiones = 0
+    for nombre, actual in resultados.items():
+        print(f"{nombre:<28}{actual['p50_ms']:>9}{actual['p95_ms']:>9}"
+              f"{actual['consultas']:>11}{actual['memoria_kb']:>12}")
+        if args.actualizar or nombre not in base:
+            continue
+        for problema in _comparar(actual, base[nombre], tolerancias):
+            print(f'  REGRESIÓN {problema} (base: {base[nombre]})')
+            regresiones += 1
+
+    if args.actualizar:
+        lineas_base[args.escala] = resultados
+        with open(LINEA_BASE, 'w', encoding='utf-8') as archivo:
+            json.dump(lineas_base, archivo, indent=2, ensure_ascii=False)
+            archivo.write('\n')
+        print(f'\nLínea base actualizada: {LINEA_BASE}')
+    elif not base:
+        print('\nNo hay línea base para esta escala: ejecutar con --actualizar')
+    elif regresiones:
+        print(f'\n{regresiones} regresiones respecto de la línea base')
+        sys.exit(1)
+    else:
+        print('\nSin regresiones')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+import click
+from app import db
+
+
+def registrar_comandos(app):
+    """Registra los comandos CLI de mantenimiento"""
+
+    @app.cli.command('stock-snapshot')
+    def stock_snapshot():
+        """Consolidar el libro de stock en snapshots por variante"""
+        from services.conciliacion import tomar_snapshot
+
+        cantidad = tomar_snapshot()
+        db.session.commit()
+        print(f"Snapshots registrados: {cantidad}")
+
+    @app.cli.command('stock-conciliar')
+    @click.option('--reparar', is_flag=True, help='Corregir Variante.stock según el libro de movimientos')
+    def stock_conciliar(reparar):
+        """Comparar el stock de cada variante con su libro de movimientos"""
+        from services.conciliacion import conciliar
+
+        diferencias = conciliar(reparar=reparar)
+        for d in diferencias:
+            print(f"{d['sku']}: stock={d['stock']} libro={d['calculado']}")
+
+        if reparar:
+            db.session.commit()
+            print(f"Variantes corregidas: {len(diferencias)}")
+        else:
+            print(f"Diferencias encontradas: {len(diferencias)}")
+
+    @app.cli.command('stock-a-fecha')
+    @click.argument('sku')
+    @click.argument('fecha', type=click.DateTime())
+    def stock_a_fecha(sku, fecha):
+        """Consultar el stock de un SKU a una fecha dada"""
+        from services.conciliacion import stock_a_fecha as consultar
+
+        stock = consultar(sku, fecha)
+        if stock is None:
+            print(f"SKU no encontrado: {sku}")
+        else:
+            print(f"{sku} al {fecha:%d/%m/%Y %H:%M}: {stock}")
+
+    @app.cli.command('caja-consolidar')
+    def caja_consolidar():
+        """Agregar un cierre automático a cada caja con movimientos sin consolidar"""
+        from models import Caja
+        from services.caja import registrar_cierre
+
+        cantidad = 0
+        for caja_id in db.session.execute(db.select(Caja.id)).scalars().all():
+            if registrar_cierre(caja_id) is not None:
+                cantidad += 1
+        db.session.commit()
+        print(f"Cajas consolidadas: {cantidad}")
+
+    @app.cli.command('resumen-ventas')
+    def resumen_ventas():
+        """Reconstruir el resumen diario de ventas desde el historial"""
+        from services.resumen import reconstruir
+
+        filas = reconstruir()
+        db.session.commit()
+        print(f"Resumen diario reconstruido: {filas} filas")
+
+    @app.cli.command('importar-catalogo')
+    @click.argument('archivo', type=click.File('r', encoding='utf-8-sig'))
+    @click.option('--usuario', default='importacion', help='Usuario registrado en los movimientos de stock')
+    @click.option('--lote', default=500, help='Filas por transacción')
+    def importar_catalogo(archivo, usuario, lote):
+        """Importar productos, variantes y stock inicial desde un CSV"""
+        from services.importar import importar_catalogo as importar, ErrorImportacion
+
+        def progreso(r):
+            print(f"{r['filas']} filas: {r['productos']} productos, "
+                  f"{r['variantes']} variantes, {len(r['errores'])} errores")
+
+        try:
+            resultado = importar(archivo, usuario, lote=lote, progreso=progreso)
+        except ErrorImportacion as e:
+            raise click.ClickException(str(e))
+
+        for linea, motivo in resultado['errores']:
+            print(f"Línea {linea}: {motivo}")
+        print(f"Importación terminada: {resultado['productos']} productos y {resultado['variantes']} variantes nuevas")
+
+    @app.cli.command('seed')
+    @click.option('--clubes', default=28, help='Cantidad de clubes')
+    @click.option('--anios', default=3, help='Años de historial de ventas')
+    @click.option('--productos-por-temporada', default=6, help='Productos por club y temporada')
+    @click.option('--clientes', default=5000, help='Cantidad de clientes')
+    @click.option('--ventas', default=100000, help='Cantidad de ventas')
+    @click.option('--semilla', default=1, help='Semilla: la misma semilla genera los mismos datos')
+    @click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d']), help='Fecha de la última venta (hoy por defecto)')
+    def seed(clubes, anios, productos_por_temporada, clientes, ventas, semilla, hasta):
+        """Generar datos sintéticos a escala para pruebas de rendimiento"""
+        import time
+        from services.generador import generar
+        from services.resumen import reconstruir
+
+        inicio = time.perf_counter()
+        resultado = generar(
+            clubes=clubes, anios=anios, productos_por_temporada=productos_por_temporada,
+            clientes=clientes, ventas=ventas, semilla=semilla, hasta=hasta,
+            progreso=lambda mensaje: print(f"[{time.perf_counter() - inicio:6.1f}s] {mensaje}")
+        )
+        filas = reconstruir()
+        db.session.commit()
+        print(f"[{time.perf_counter() - inicio:6.1f}s] resumen diario: {filas} filas")
+        print(', '.join(f'{v} {k}' for k, v in resultado.items()))
+        if app.config.get('BUSQUEDA_BACKEND') == 'fts':
+            print("Ejecutar 'flask busqueda-fts' para poblar la tabla de búsqueda")
+
+    @app.cli.command('busqueda-fts')
+    def busqueda_fts():
+        """Crear y poblar la tabla de búsqueda de texto completo (BUSQUEDA_BACKEND=fts)"""
+        from services.busqueda_fts import crear_tabla, sincronizar
+
+        conexion = db.session.connection()
+        crear_tabla(conexion)
+        sincronizar(conexion, completo=True)
+        db.session.commit()
+        print("Tabla de búsqueda de texto completo actualizada.")
+
+    @app.cli.command('replica-sincronizar')
+    def replica_sincronizar():
+        """Copiar la base primaria sobre la réplica (ambas SQLite, para pruebas locales)"""
+        from services.replica import sincronizar
+
+        try:
+            sincronizar()
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        print("Réplica sincronizada con la base primaria.")
@@ -1,7 +1,10 @@
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired, FileAllowed
 from wtforms import StringField, IntegerField, FloatField, SelectField, TextAreaField, BooleanField, PasswordField
 from wtforms.validators import DataRequired, Email, Optional, NumberRange, Length, ValidationError
+from wtforms.widgets import HiddenInput
 from models import Usuario, Variante, Club, Categoria, Cliente, Proveedor  # AGREGADOS LOS IMPORTS FALTANTES
+from services.clientes import existe_cliente
 
 class LoginForm(FlaskForm):
     email = StringField('Email', validators=[
@@ -38,14 +41,39 @@ class VarianteForm(FlaskForm):
         if Variante.query.filter_by(sku=field.data).first():
             raise ValidationError('Este SKU ya está en uso. Por favor elija otro.')
 
+class ImportarCatalogoForm(FlaskForm):
+    archivo = FileField('Archivo CSV', validators=[
+        FileRequired('Seleccione un archivo'),
+        FileAllowed(['csv'], 'El archivo debe ser .csv')
+    ])
+
 class VentaForm(FlaskForm):
-    cliente_id = SelectField('Cliente', coerce=int, validators=[Optional()])
+    # Se completa con la búsqueda de clientes (api.buscar_clientes); 0 o vacío = cliente ocasional
+    cliente_id = IntegerField('Cliente', validators=[Optional()], widget=HiddenInput())
+
+    def validate_cliente_id(self, field):
+        if field.data and not existe_cliente(field.data):
+            raise ValidationError('El cliente seleccionado no existe.')
 
 class MovimientoCajaForm(FlaskForm):
     tipo = SelectField('Tipo', choices=[('ingreso', 'Ingreso'), ('egreso', 'Egreso')], validators=[DataRequired()])
     monto = FloatField('Monto', validators=[DataRequired(), NumberRange(min=0.01)])
     motivo = StringField('Motivo', validators=[DataRequired()])
 
+class CierreCajaForm(FlaskForm):
+    pass
+
+class AjustePreciosForm(FlaskForm):
+    club_id = SelectField('Club', coerce=int, validators=[Optional()])
+    categoria_id = SelectField('Categoría', coerce=int, validators=[Optional()])
+    temporada = StringField('Temporada', validators=[Optional()])
+    talle = StringField('Talle', validators=[Optional()])
+    operacion = SelectField('Operación', choices=[
+        ('porcentaje', 'Porcentaje (%)'), ('monto', 'Monto fijo (+/-)'), ('fijo', 'Precio final')
+    ], validators=[DataRequired()])
+    valor = FloatField('Valor', validators=[DataRequired()])
+    incluir_productos = BooleanField('Actualizar también el precio base del producto')
+
 class ClubForm(FlaskForm):
     nombre = StringField('Nombre', validators=[DataRequired()])
     liga = StringField('Liga', validators=[Optional()])
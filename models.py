@@ -20,6 +20,12 @@ class Categoria(db.Model):
 
 class Producto(db.Model):
     __tablename__ = 'productos'
+    __table_args__ = (
+        db.Index('ix_productos_club_categoria_temporada', 'club_id', 'categoria_id', 'temporada'),
+        db.Index('ix_productos_categoria_temporada', 'categoria_id', 'temporada'),
+        db.Index('ix_productos_temporada', 'temporada'),
+        db.Index('ix_productos_nombre', 'nombre'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False)
     club_id = db.Column(db.Integer, db.ForeignKey('clubes.id'), nullable=False)
@@ -38,6 +44,10 @@ class Producto(db.Model):
 
 class Variante(db.Model):
     __tablename__ = 'variantes'
+    __table_args__ = (
+        db.Index('ix_variantes_producto_talle', 'producto_id', 'talle'),
+        db.Index('ix_variantes_talle', 'talle'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
     talle = db.Column(db.String(10), nullable=False)
@@ -46,23 +56,39 @@ class Variante(db.Model):
     precio = db.Column(db.Float, nullable=False)
     stock = db.Column(db.Integer, default=0)
     stock_minimo = db.Column(db.Integer, default=5)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relaciones
     producto = db.relationship('Producto', back_populates='variantes')
     ventas = db.relationship('VentaItem', back_populates='variante', cascade='all, delete-orphan')
     movimientos = db.relationship('MovimientoStock', back_populates='variante', cascade='all, delete-orphan')
+    snapshots = db.relationship('SnapshotStock', cascade='all, delete-orphan')
 
 class Cliente(db.Model):
     __tablename__ = 'clientes'
+    __table_args__ = (
+        db.Index('ix_clientes_nombre', 'nombre'),
+        db.Index('ix_clientes_nombre_busqueda', 'nombre_busqueda'),
+        db.Index('ix_clientes_email_busqueda', 'email_busqueda'),
+        db.Index('ix_clientes_telefono_busqueda', 'telefono_busqueda'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False)
+    nombre_busqueda = db.Column(db.String(100))  # nombre normalizado, lo mantiene services.clientes
     email = db.Column(db.String(100), unique=True)
+    email_busqueda = db.Column(db.String(100))  # email en minúsculas, ídem
     telefono = db.Column(db.String(20))
+    telefono_busqueda = db.Column(db.String(20))  # solo los dígitos del teléfono, ídem
     direccion = db.Column(db.Text)
     ventas = db.relationship('Venta', back_populates='cliente', cascade='all, delete-orphan')
 
 class Venta(db.Model):
     __tablename__ = 'ventas'
+    __table_args__ = (
+        db.Index('ix_ventas_fecha_venta', 'fecha_venta'),
+        db.Index('ix_ventas_cliente_fecha', 'cliente_id', 'fecha_venta'),
+        db.Index('ix_ventas_tipo_fecha', 'tipo_venta', 'fecha_venta'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     fecha_venta = db.Column(db.DateTime, default=datetime.utcnow)
     cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'))
@@ -78,6 +104,9 @@ class Venta(db.Model):
 
 class VentaItem(db.Model):
     __tablename__ = 'ventas_items'
+    __table_args__ = (
+        db.Index('ix_ventas_items_venta', 'venta_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     venta_id = db.Column(db.Integer, db.ForeignKey('ventas.id'), nullable=False)
     variante_id = db.Column(db.Integer, db.ForeignKey('variantes.id'), nullable=False)
@@ -89,15 +118,38 @@ class VentaItem(db.Model):
     venta = db.relationship('Venta', back_populates='items')
     variante = db.relationship('Variante', back_populates='ventas')
 
+class ResumenVentaDiario(db.Model):
+    """Acumulado diario de ventas por club, categoría y tipo de venta (ver services.resumen)"""
+    __tablename__ = 'ventas_resumen_diario'
+    __table_args__ = (
+        db.UniqueConstraint('fecha', 'club_id', 'categoria_id', 'tipo_venta', name='uq_ventas_resumen_diario'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.Date, nullable=False)
+    club_id = db.Column(db.Integer, db.ForeignKey('clubes.id'), nullable=False)
+    categoria_id = db.Column(db.Integer, db.ForeignKey('categorias.id'), nullable=False)
+    tipo_venta = db.Column(db.String(20), nullable=False, default='')
+    unidades = db.Column(db.Integer, nullable=False, default=0)
+    recaudacion = db.Column(db.Float, nullable=False, default=0.0)
+    tickets = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Relaciones
+    club = db.relationship('Club')
+    categoria = db.relationship('Categoria')
+
 class Caja(db.Model):
     __tablename__ = 'cajas'
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(50), nullable=False)
-    saldo = db.Column(db.Float, default=0.0)
+    saldo = db.Column(db.Float, default=0.0)  # Histórico: el saldo vigente se deriva de los movimientos (services.caja)
     movimientos = db.relationship('MovimientoCaja', back_populates='caja', cascade='all, delete-orphan')
+    cierres = db.relationship('CierreCaja', back_populates='caja', cascade='all, delete-orphan')
 
 class MovimientoCaja(db.Model):
     __tablename__ = 'movimientos_caja'
+    __table_args__ = (
+        db.Index('ix_movimientos_caja_caja_fecha', 'caja_id', 'fecha'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     caja_id = db.Column(db.Integer, db.ForeignKey('cajas.id'), nullable=False)
     fecha = db.Column(db.DateTime, default=datetime.utcnow)
@@ -109,8 +161,29 @@ class MovimientoCaja(db.Model):
     caja = db.relationship('Caja', back_populates='movimientos')
     venta = db.relationship('Venta', back_populates='movimiento_caja', uselist=False)
 
+class CierreCaja(db.Model):
+    """Punto de control del libro de caja: saldo acumulado hasta un movimiento dado"""
+    __tablename__ = 'cierres_caja'
+    __table_args__ = (
+        db.Index('ix_cierres_caja_caja_movimiento', 'caja_id', 'ultimo_movimiento_id', unique=True),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    caja_id = db.Column(db.Integer, db.ForeignKey('cajas.id'), nullable=False)
+    fecha = db.Column(db.DateTime, default=datetime.utcnow)
+    tipo = db.Column(db.String(20), nullable=False, default='automatico')  # automatico / cierre
+    ultimo_movimiento_id = db.Column(db.Integer, nullable=False, default=0)
+    saldo = db.Column(db.Float, nullable=False, default=0.0)
+    usuario = db.Column(db.String(50))
+    
+    # Relaciones
+    caja = db.relationship('Caja', back_populates='cierres')
+
 class MovimientoStock(db.Model):
     __tablename__ = 'movimientos_stock'
+    __table_args__ = (
+        db.Index('ix_movimientos_stock_variante_fecha', 'variante_id', 'fecha'),
+        db.Index('ix_movimientos_stock_fecha', 'fecha'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     variante_id = db.Column(db.Integer, db.ForeignKey('variantes.id'), nullable=False)
     fecha = db.Column(db.DateTime, default=datetime.utcnow)
@@ -122,6 +195,34 @@ class MovimientoStock(db.Model):
     # Relaciones
     variante = db.relationship('Variante', back_populates='movimientos')
 
+class SnapshotStock(db.Model):
+    """Stock de una variante consolidado hasta un movimiento de stock dado"""
+    __tablename__ = 'snapshots_stock'
+    __table_args__ = (
+        db.Index('ix_snapshots_stock_variante_fecha', 'variante_id', 'fecha'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    variante_id = db.Column(db.Integer, db.ForeignKey('variantes.id'), nullable=False)
+    fecha = db.Column(db.DateTime, default=datetime.utcnow)
+    ultimo_movimiento_id = db.Column(db.Integer, nullable=False, default=0)
+    stock = db.Column(db.Integer, nullable=False, default=0)
+
+class HistorialPrecio(db.Model):
+    """Precio anterior y nuevo de una variante (o del precio base de un producto)"""
+    __tablename__ = 'historial_precios'
+    __table_args__ = (
+        db.Index('ix_historial_precios_variante_fecha', 'variante_id', 'fecha'),
+        db.Index('ix_historial_precios_producto_fecha', 'producto_id', 'fecha'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.DateTime, default=datetime.utcnow)
+    variante_id = db.Column(db.Integer, db.ForeignKey('variantes.id'))
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'))
+    precio_anterior = db.Column(db.Float)
+    precio_nuevo = db.Column(db.Float, nullable=False)
+    motivo = db.Column(db.String(255))
+    usuario = db.Column(db.String(50))
+
 class Proveedor(db.Model):
     __tablename__ = 'proveedores'
     id = db.Column(db.Integer, primary_key=True)
@@ -1,7 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required
 from sqlalchemy import or_
 from models import db, Producto, Variante, Club
+from services.busqueda import indice_actual
+from services import busqueda_fts, clientes
+from services.skus import consultar_sku, consultar_skus, MAX_SKUS_POR_CONSULTA
 
 bp = Blueprint('api', __name__)
 
@@ -13,40 +16,48 @@ def buscar_productos():
     if not termino:
         return jsonify([])
     
-    productos = Producto.query.join(Club).join(Variante).filter(
-        or_(
-            Producto.nombre.ilike(f'%{termino}%'),
-            Variante.sku.ilike(f'%{termino}%'),
-            Club.nombre.ilike(f'%{termino}%')
-        )
-    ).options(
-        db.joinedload(Producto.variantes),
-        db.joinedload(Producto.club)
-    ).limit(10).all()
-    
-    resultados = []
-    for p in productos:
-        for v in p.variantes:
-            resultados.append({
-                'id': v.id,
-                'text': f"{p.nombre} - {p.club.nombre} ({v.talle}) - SKU: {v.sku} - Stock: {v.stock}",
-                'precio': v.precio,
-                'stock': v.stock
-            })
-    
-    return jsonify(resultados)
+    backend = current_app.config.get('BUSQUEDA_BACKEND', 'memoria')
+    if backend == 'fts':
+        return jsonify(busqueda_fts.buscar(termino))
+    if backend == 'ilike':
+        return jsonify(busqueda_fts.buscar_ilike(termino))
+    return jsonify(indice_actual().buscar(termino))
+
+@bp.route('/buscar_clientes')
+@login_required
+def buscar_clientes():
+    """Clientes por prefijo de nombre, email o teléfono, para los buscadores de ventas"""
+    termino = request.args.get('q', '')
+    if len(termino.strip()) < 2:
+        return jsonify([])
+    return jsonify(clientes.buscar_clientes(termino))
 
 @bp.route('/stock/<sku>')
 @login_required
 def stock(sku):
-    variante = Variante.query.filter_by(sku=sku).first()
-    if not variante:
+    datos = consultar_sku(sku)
+    if not datos:
         return jsonify({'error': 'SKU no encontrado'}), 404
     
+    return jsonify(datos)
+
+@bp.route('/stock', methods=['GET', 'POST'])
+@login_required
+def stock_lote():
+    """Stock de varios SKUs: POST {"skus": [...]} o GET ?skus=A,B,C"""
+    if request.method == 'POST':
+        datos = request.get_json(silent=True)
+        skus = datos.get('skus') if isinstance(datos, dict) else datos
+    else:
+        skus = [s for s in request.args.get('skus', '').split(',') if s]
+    
+    if not isinstance(skus, list) or not all(isinstance(s, str) for s in skus):
+        return jsonify({'error': 'Se esperaba una lista de SKUs'}), 400
+    if len(skus) > MAX_SKUS_POR_CONSULTA:
+        return jsonify({'error': f'Máximo {MAX_SKUS_POR_CONSULTA} SKUs por consulta'}), 400
+    
+    encontrados = consultar_skus(skus)
     return jsonify({
-        'sku': variante.sku,
-        'producto': variante.producto.nombre,
-        'talle': variante.talle,
-        'stock': variante.stock,
-        'precio': variante.precio
-    })
\ No newline at end of file
+        'productos': list(encontrados.values()),
+        'no_encontrados': [sku for sku in dict.fromkeys(skus) if sku not in encontrados]
+    })
@@ -3,6 +3,8 @@ from flask_login import login_user, logout_user, current_user, LoginManager
 from werkzeug.security import check_password_hash
 from models import db, Usuario, Producto, Venta, Cliente, Variante
 from forms import LoginForm
+from services.metricas import metricas_dashboard
+from services.replica import usar_replica
 
 bp = Blueprint('auth', __name__)
 
@@ -66,17 +68,15 @@ def logout():
     return redirect(url_for('auth.login'))
 
 @bp.route('/dashboard')
+@usar_replica
 def dashboard():
-    total_productos = Producto.query.count()
-    total_ventas = Venta.query.count()
-    total_clientes = Cliente.query.count()
-    
-    ventas_recientes = Venta.query.order_by(Venta.fecha_venta.desc()).limit(5).all()
-    productos_bajo_stock = Variante.query.filter(Variante.stock <= Variante.stock_minimo).count()
+    metricas = metricas_dashboard()
     
     return render_template('dashboard.html',
-                         total_productos=total_productos,
-                         total_ventas=total_ventas,
-                         total_clientes=total_clientes,
-                         ventas_recientes=ventas_recientes,
-                         productos_bajo_stock=productos_bajo_stock)
\ No newline at end of file
+                         total_productos=metricas['total_productos'],
+                         total_ventas=metricas['total_ventas'],
+                         total_clientes=metricas['total_clientes'],
+                         ventas_recientes=metricas['ventas_recientes'],
+                         productos_bajo_stock=metricas['productos_bajo_stock'],
+                         recaudacion_hoy=metricas['recaudacion_hoy'],
+                         recaudacion_mes=metricas['recaudacion_mes'])
\ No newline at end of file
@@ -1,25 +1,50 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from models import db, Caja, MovimientoCaja, Venta
-from forms import MovimientoCajaForm
+from sqlalchemy import select
+from forms import MovimientoCajaForm, CierreCajaForm
+from services.caja import obtener_caja, saldo_caja, ultimo_cierre, registrar_cierre, consolidar_si_corresponde
+from services.listados import filtrar_fechas, paginar
+from services.exportar import respuesta_csv
+from services.replica import usar_replica
 
 bp = Blueprint('caja', __name__, url_prefix='/caja')
 
 @bp.route('/')
 @login_required
 def gestion():
-    caja = Caja.query.first()
-    if not caja:
-        caja = Caja(nombre="Caja Principal", saldo=0)
-        db.session.add(caja)
-        db.session.commit()
+    caja = obtener_caja()
+    saldo = saldo_caja(caja.id)
+    cierre = ultimo_cierre(caja.id)
+    db.session.commit()  # solo si obtener_caja acaba de crear la caja
     
     movimientos = MovimientoCaja.query.filter_by(caja_id=caja.id)\
         .order_by(MovimientoCaja.fecha.desc())\
         .limit(10)\
         .all()
     
-    return render_template('caja/gestion.html', caja=caja, movimientos=movimientos)
+    return render_template('caja/gestion.html',
+                        caja=caja,
+                        saldo=saldo,
+                        cierre=cierre,
+                        cierre_form=CierreCajaForm(),
+                        movimientos=movimientos)
+
+@bp.route('/cierre', methods=['POST'])
+@login_required
+def cerrar():
+    form = CierreCajaForm()
+    
+    if form.validate_on_submit():
+        caja = obtener_caja()
+        cierre = registrar_cierre(caja.id, tipo='cierre', usuario=current_user.username)
+        db.session.commit()
+        if cierre:
+            flash(f'Cierre de caja registrado. Saldo: ${cierre.saldo:.2f}', 'success')
+        else:
+            flash('No hay movimientos nuevos desde el último cierre', 'info')
+    
+    return redirect(url_for('caja.gestion'))
 
 @bp.route('/movimientos/nuevo', methods=['GET', 'POST'])
 @login_required
@@ -27,12 +52,9 @@ def nuevo_movimiento():
     form = MovimientoCajaForm()
     
     if form.validate_on_submit():
-        caja = Caja.query.first()
-        if not caja:
-            caja = Caja(nombre="Caja Principal", saldo=0)
-            db.session.add(caja)
+        caja = obtener_caja()
         
-        if form.tipo.data == 'egreso' and caja.saldo < form.monto.data:
+        if form.tipo.data == 'egreso' and saldo_caja(caja.id) < form.monto.data:
             flash('No hay suficiente saldo en caja para este egreso', 'danger')
             return render_template('caja/nuevo_movimiento.html', form=form)
         
@@ -43,45 +65,70 @@ def nuevo_movimiento():
             motivo=form.motivo.data
         )
         db.session.add(movimiento)
-        
-        if form.tipo.data == 'ingreso':
-            caja.saldo += form.monto.data
-        else:
-            caja.saldo -= form.monto.data
-        
+        db.session.flush()
+        consolidar_si_corresponde(caja.id, movimiento.id)
         db.session.commit()
         flash('Movimiento registrado exitosamente!', 'success')
         return redirect(url_for('caja.gestion'))
     
     return render_template('caja/nuevo_movimiento.html', form=form)
 
-@bp.route('/movimientos')
-@login_required
-def listar_movimientos():
+def _consulta_movimientos(caja):
+    """Movimientos de la caja con los filtros del pedido (listado y exportación)"""
     fecha_desde = request.args.get('fecha_desde')
     fecha_hasta = request.args.get('fecha_hasta')
     tipo = request.args.get('tipo')
     
+    consulta = select(
+        MovimientoCaja.id,
+        MovimientoCaja.fecha,
+        MovimientoCaja.tipo,
+        MovimientoCaja.monto,
+        MovimientoCaja.motivo
+    ).where(MovimientoCaja.caja_id == caja.id)
+    
+    consulta = filtrar_fechas(consulta, MovimientoCaja.fecha, fecha_desde, fecha_hasta)
+    if tipo:
+        consulta = consulta.where(MovimientoCaja.tipo == tipo)
+    
+    filtros = {
+        'fecha_desde': fecha_desde,
+        'fecha_hasta': fecha_hasta,
+        'tipo': tipo
+    }
+    return consulta, filtros
+
+@bp.route('/movimientos')
+@login_required
+@usar_replica
+def listar_movimientos():
     caja = Caja.query.first()
     if not caja:
         return redirect(url_for('caja.gestion'))
     
-    query = MovimientoCaja.query.filter_by(caja_id=caja.id)
-    
-    if fecha_desde:
-        query = query.filter(MovimientoCaja.fecha >= fecha_desde)
-    if fecha_hasta:
-        query = query.filter(MovimientoCaja.fecha <= fecha_hasta)
-    if tipo:
-        query = query.filter(MovimientoCaja.tipo == tipo)
-    
-    movimientos = query.order_by(MovimientoCaja.fecha.desc()).all()
+    consulta, filtros = _consulta_movimientos(caja)
+    pagina = paginar(f'caja-{caja.id}', consulta, MovimientoCaja.fecha, MovimientoCaja.id,
+                     cursor=request.args.get('despues'), filtros=filtros)
     
     return render_template('caja/movimientos.html', 
-                        movimientos=movimientos,
+                        movimientos=pagina.items,
+                        pagina=pagina,
                         caja=caja,
-                        filtros={
-                            'fecha_desde': fecha_desde,
-                            'fecha_hasta': fecha_hasta,
-                            'tipo': tipo
-                        })
\ No newline at end of file
+                        filtros=filtros)
+
+@bp.route('/movimientos/exportar')
+@login_required
+@usar_replica
+def exportar_movimientos():
+    caja = Caja.query.first()
+    if not caja:
+        return redirect(url_for('caja.gestion'))
+    
+    consulta, _ = _consulta_movimientos(caja)
+    return respuesta_csv('movimientos_caja', consulta.order_by(MovimientoCaja.fecha, MovimientoCaja.id), [
+        ('ID', 'id'),
+        ('Fecha', 'fecha'),
+        ('Tipo', 'tipo'),
+        ('Motivo', 'motivo'),
+        ('Monto', 'monto')
+    ])
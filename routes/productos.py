@@ -1,17 +1,35 @@
+import io
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from models import db, Producto, Variante, Club, Categoria, MovimientoStock
-from forms import ProductoForm, VarianteForm
+from forms import ProductoForm, VarianteForm, ImportarCatalogoForm, AjustePreciosForm
+from sqlalchemy import func, select
+from services.stock import aplicar_movimientos, fijar_stock, StockConflicto
+from services.exportar import respuesta_csv
+from services.replica import usar_replica
+from services.consultas import cacheada, opciones
+from services.importar import importar_catalogo, ErrorImportacion
+from services.precios import previsualizar, ajustar_precios, AjusteInvalido
 
 bp = Blueprint('productos', __name__, url_prefix='/productos')
 
+def _filtros_catalogo():
+    return {
+        'club': request.args.get('club'),
+        'temporada': request.args.get('temporada'),
+        'categoria': request.args.get('categoria'),
+        'talle': request.args.get('talle')
+    }
+
 @bp.route('/')
 @login_required
+@usar_replica
 def listar():
-    club_id = request.args.get('club')
-    temporada = request.args.get('temporada')
-    categoria_id = request.args.get('categoria')
-    talle = request.args.get('talle')
+    filtros = _filtros_catalogo()
+    club_id = filtros['club']
+    temporada = filtros['temporada']
+    categoria_id = filtros['categoria']
+    talle = filtros['talle']
     
     query = Producto.query
     
@@ -24,29 +42,79 @@ def listar():
     if talle:
         query = query.join(Variante).filter(Variante.talle == talle)
     
-    productos = query.order_by(Producto.nombre).all()
-    clubes = Club.query.order_by(Club.nombre).all()
-    categorias = Categoria.query.order_by(Categoria.nombre).all()
-    talles = db.session.query(Variante.talle).distinct().all()
+    # Solo se muestra cuántas variantes tiene cada producto: se cuentan con una
+    # subconsulta correlacionada (índice de producto_id) en lugar de cargarlas
+    variante = db.aliased(Variante)
+    cantidad = select(func.count(variante.id))\
+        .where(variante.producto_id == Producto.id)\
+        .correlate(Producto).scalar_subquery()
+    filas = query.options(
+        db.joinedload(Producto.club),
+        db.joinedload(Producto.categoria)
+    ).add_columns(cantidad).order_by(Producto.nombre).all()
+    productos = [producto for producto, _ in filas]
+    cantidad_variantes = {producto.id: n for producto, n in filas}
+    clubes = cacheada(select(Club.id, Club.nombre).order_by(Club.nombre))
+    categorias = cacheada(select(Categoria.id, Categoria.nombre).order_by(Categoria.nombre))
+    talles = cacheada(select(Variante.talle).distinct().order_by(Variante.talle), escalares=True)
     
     return render_template('productos/listar.html', 
                         productos=productos,
+                        cantidad_variantes=cantidad_variantes,
                         clubes=clubes,
                         categorias=categorias,
                         talles=[t[0] for t in talles],
-                        filtros={
-                            'club': club_id,
-                            'temporada': temporada,
-                            'categoria': categoria_id,
-                            'talle': talle
-                        })
+                        filtros=filtros)
+
+@bp.route('/exportar')
+@login_required
+@usar_replica
+def exportar():
+    """Catálogo en CSV, una fila por variante, con los filtros del listado"""
+    filtros = _filtros_catalogo()
+    consulta = select(
+        Producto.id.label('producto_id'),
+        Producto.nombre,
+        Club.nombre.label('club'),
+        Categoria.nombre.label('categoria'),
+        Producto.temporada,
+        Variante.talle,
+        Variante.sku,
+        Variante.precio,
+        Variante.stock,
+        Variante.stock_minimo
+    ).join(Club, Producto.club_id == Club.id)\
+        .join(Categoria, Producto.categoria_id == Categoria.id)\
+        .outerjoin(Variante, Variante.producto_id == Producto.id)
+    
+    if filtros['club']:
+        consulta = consulta.where(Producto.club_id == filtros['club'])
+    if filtros['temporada']:
+        consulta = consulta.where(Producto.temporada == filtros['temporada'])
+    if filtros['categoria']:
+        consulta = consulta.where(Producto.categoria_id == filtros['categoria'])
+    if filtros['talle']:
+        consulta = consulta.where(Variante.talle == filtros['talle'])
+    
+    return respuesta_csv('catalogo', consulta.order_by(Producto.nombre, Producto.id, Variante.id), [
+        ('Producto ID', 'producto_id'),
+        ('Producto', 'nombre'),
+        ('Club', 'club'),
+        ('Categoría', 'categoria'),
+        ('Temporada', 'temporada'),
+        ('Talle', 'talle'),
+        ('SKU', 'sku'),
+        ('Precio', 'precio'),
+        ('Stock', 'stock'),
+        ('Stock Mínimo', 'stock_minimo')
+    ])
 
 @bp.route('/nuevo', methods=['GET', 'POST'])
 @login_required
 def crear():
     form = ProductoForm()
-    form.club_id.choices = [(c.id, c.nombre) for c in Club.query.order_by(Club.nombre)]
-    form.categoria_id.choices = [(c.id, c.nombre) for c in Categoria.query.order_by(Categoria.nombre)]
+    form.club_id.choices = opciones(Club)
+    form.categoria_id.choices = opciones(Categoria)
     
     if form.validate_on_submit():
         producto = Producto(
@@ -64,6 +132,58 @@ def crear():
     
     return render_template('productos/crear.html', form=form)
 
+@bp.route('/importar', methods=['GET', 'POST'])
+@login_required
+def importar():
+    form = ImportarCatalogoForm()
+    resultado = None
+    
+    if form.validate_on_submit():
+        # El archivo se lee línea a línea desde el stream del upload
+        lineas = io.TextIOWrapper(form.archivo.data.stream, encoding='utf-8-sig', newline='')
+        try:
+            resultado = importar_catalogo(lineas, current_user.username)
+        except ErrorImportacion as e:
+            flash(str(e), 'danger')
+        except UnicodeDecodeError:
+            flash('El archivo debe estar codificado en UTF-8', 'danger')
+        else:
+            flash(f"Importación terminada: {resultado['productos']} productos y "
+                  f"{resultado['variantes']} variantes nuevas", 'success')
+    
+    return render_template('productos/importar.html', form=form, resultado=resultado)
+
+@bp.route('/precios', methods=['GET', 'POST'])
+@login_required
+def precios():
+    form = AjustePreciosForm()
+    form.club_id.choices = [(0, 'Todos')] + opciones(Club)
+    form.categoria_id.choices = [(0, 'Todas')] + opciones(Categoria)
+    previa = None
+    
+    if form.validate_on_submit():
+        filtros = {
+            'club_id': form.club_id.data,
+            'categoria_id': form.categoria_id.data,
+            'temporada': form.temporada.data,
+            'talle': form.talle.data
+        }
+        try:
+            if request.form.get('accion') == 'aplicar':
+                variantes, productos = ajustar_precios(
+                    filtros, form.operacion.data, form.valor.data, current_user.username,
+                    incluir_productos=form.incluir_productos.data
+                )
+                db.session.commit()
+                flash(f'Precios actualizados: {variantes} variantes y {productos} productos', 'success')
+                return redirect(url_for('productos.precios'))
+            previa = previsualizar(filtros, form.operacion.data, form.valor.data)
+        except AjusteInvalido as e:
+            db.session.rollback()
+            flash(str(e), 'danger')
+    
+    return render_template('productos/precios.html', form=form, previa=previa)
+
 @bp.route('/<int:producto_id>/variantes', methods=['GET', 'POST'])
 @login_required
 def agregar_variantes(producto_id):
@@ -77,19 +197,18 @@ def agregar_variantes(producto_id):
             color=form.color.data,
             sku=form.sku.data,
             precio=form.precio.data,
-            stock=form.stock.data,
+            stock=0,
             stock_minimo=form.stock_minimo.data
         )
         db.session.add(variante)
+        db.session.flush()
         
-        movimiento = MovimientoStock(
-            variante_id=variante.id,
-            tipo='entrada',
-            cantidad=form.stock.data,
-            motivo='Carga inicial de stock',
-            usuario=current_user.username
-        )
-        db.session.add(movimiento)
+        # El stock inicial entra por el libro para que variante y movimientos coincidan
+        if form.stock.data:
+            aplicar_movimientos(
+                [(variante.id, 'entrada', form.stock.data, 'Carga inicial de stock')],
+                current_user.username
+            )
         
         db.session.commit()
         flash('Variante agregada exitosamente!', 'success')
@@ -108,24 +227,19 @@ def editar_variante(variante_id):
     form = VarianteForm(obj=variante)
     
     if form.validate_on_submit():
-        diferencia = form.stock.data - variante.stock
-        
         variante.talle = form.talle.data
         variante.color = form.color.data
         variante.sku = form.sku.data
         variante.precio = form.precio.data
         variante.stock_minimo = form.stock_minimo.data
+        db.session.flush()
         
-        if diferencia != 0:
-            tipo = 'entrada' if diferencia > 0 else 'salida'
-            movimiento = MovimientoStock(
-                variante_id=variante.id,
-                tipo=tipo,
-                cantidad=abs(diferencia),
-                motivo='Ajuste manual de stock',
-                usuario=current_user.username
-            )
-            db.session.add(movimiento)
+        try:
+            fijar_stock(variante.id, form.stock.data, 'Ajuste manual de stock', current_user.username)
+        except StockConflicto:
+            db.session.rollback()
+            flash('La variante fue modificada por otro usuario, intente nuevamente', 'danger')
+            return redirect(url_for('productos.editar_variante', variante_id=variante_id))
         
         db.session.commit()
         flash('Variante actualizada exitosamente!', 'success')
@@ -1,43 +1,88 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, stream_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from models import db, Variante, Producto, Categoria, Club, MovimientoStock
+from sqlalchemy import select
 from forms import VarianteForm
+from services.stock import registrar_movimiento, StockInsuficiente
+from services.listados import filtrar_fechas, paginar, paginar_por_numero
+from services.exportar import respuesta_csv
+from services.replica import usar_replica
+from services.consultas import cacheada
 
 bp = Blueprint('stock', __name__, url_prefix='/stock')
 
+# Columnas por las que se puede ordenar la grilla de stock
+ORDENES_GESTION = {
+    'producto': (Producto.nombre, Variante.talle),
+    'club': (Club.nombre, Producto.nombre, Variante.talle),
+    'categoria': (Categoria.nombre, Producto.nombre, Variante.talle),
+    'sku': (Variante.sku,),
+    'stock': (Variante.stock, Producto.nombre, Variante.talle),
+}
+
+# Filas que se traen por tanda del cursor en el modo completo
+TANDA_GESTION = 500
+
 @bp.route('/')
 @login_required
 def gestion():
-    stock_bajo = request.args.get('stock_bajo', 'false') == 'true'
+    stock_bajo = request.args.get('stock_bajo') in ('true', 'on')
     categoria_id = request.args.get('categoria_id')
     club_id = request.args.get('club_id')
+    orden = request.args.get('orden')
+    if orden not in ORDENES_GESTION:
+        orden = 'producto'
+    direccion = 'desc' if request.args.get('dir') == 'desc' else 'asc'
+    completo = request.args.get('modo') == 'completo'
     
-    query = Variante.query.join(Variante.producto)
+    consulta = select(
+        Variante.id,
+        Variante.talle,
+        Variante.sku,
+        Variante.stock,
+        Variante.stock_minimo,
+        Producto.nombre.label('producto_nombre'),
+        Club.nombre.label('club_nombre'),
+        Categoria.nombre.label('categoria_nombre')
+    ).join(Producto, Variante.producto_id == Producto.id)\
+        .join(Club, Producto.club_id == Club.id)\
+        .join(Categoria, Producto.categoria_id == Categoria.id)
     
     if stock_bajo:
-        query = query.filter(Variante.stock <= Variante.stock_minimo)
+        consulta = consulta.where(Variante.stock <= Variante.stock_minimo)
     if categoria_id:
-        query = query.filter(Producto.categoria_id == categoria_id)
+        consulta = consulta.where(Producto.categoria_id == categoria_id)
     if club_id:
-        query = query.filter(Producto.club_id == club_id)
+        consulta = consulta.where(Producto.club_id == club_id)
     
-    variantes = query.options(
-        db.joinedload(Variante.producto).joinedload(Producto.club),
-        db.joinedload(Variante.producto).joinedload(Producto.categoria)
-    ).order_by(Producto.nombre, Variante.talle).all()
+    columnas = ORDENES_GESTION[orden] + (Variante.id,)
+    if direccion == 'desc':
+        columnas = [columna.desc() for columna in columnas]
     
-    categorias = Categoria.query.order_by(Categoria.nombre).all()
-    clubes = Club.query.order_by(Club.nombre).all()
+    filtros = {
+        'stock_bajo': 'true' if stock_bajo else None,
+        'categoria_id': categoria_id,
+        'club_id': club_id
+    }
+    contexto = {
+        'categorias': cacheada(select(Categoria.id, Categoria.nombre).order_by(Categoria.nombre)),
+        'clubes': cacheada(select(Club.id, Club.nombre).order_by(Club.nombre)),
+        'filtros': filtros,
+        'orden': orden,
+        'direccion': direccion
+    }
     
-    return render_template('stock/gestion.html', 
-                        variantes=variantes,
-                        categorias=categorias,
-                        clubes=clubes,
-                        filtros={
-                            'stock_bajo': stock_bajo,
-                            'categoria_id': categoria_id,
-                            'club_id': club_id
-                        })
+    if completo:
+        # Las filas se renderizan a medida que salen del cursor: el primer byte
+        # sale enseguida y la memoria no crece con el tamaño del catálogo
+        variantes = db.session.execute(
+            consulta.order_by(*columnas).execution_options(yield_per=TANDA_GESTION)
+        )
+        return stream_template('stock/gestion.html', variantes=variantes, pagina=None, **contexto)
+    
+    pagina = paginar_por_numero('stock-gestion', consulta, columnas,
+                                numero=request.args.get('pagina', 1, type=int), filtros=filtros)
+    return render_template('stock/gestion.html', variantes=pagina.items, pagina=pagina, **contexto)
 
 @bp.route('/ajustar/<int:variante_id>', methods=['GET', 'POST'])
 @login_required
@@ -60,24 +105,13 @@ def ajustar(variante_id):
                 flash('La cantidad debe ser mayor a cero', 'danger')
                 return redirect(url_for('stock.ajustar', variante_id=variante_id))
             
-            if tipo == 'salida' and variante.stock < cantidad:
+            try:
+                registrar_movimiento(variante.id, tipo, cantidad, motivo, current_user.username)
+            except StockInsuficiente:
+                db.session.rollback()
                 flash('No hay suficiente stock para este ajuste', 'danger')
                 return redirect(url_for('stock.ajustar', variante_id=variante_id))
             
-            movimiento = MovimientoStock(
-                variante_id=variante.id,
-                tipo=tipo,
-                cantidad=cantidad,
-                motivo=motivo,
-                usuario=current_user.username
-            )
-            db.session.add(movimiento)
-            
-            if tipo == 'entrada':
-                variante.stock += cantidad
-            else:
-                variante.stock -= cantidad
-            
             db.session.commit()
             flash(f'Stock ajustado exitosamente ({tipo} de {cantidad} unidades)', 'success')
             return redirect(url_for('stock.gestion'))
@@ -88,37 +122,69 @@ def ajustar(variante_id):
     
     return render_template('stock/ajustar.html', variante=variante)
 
-@bp.route('/movimientos')
-@login_required
-def movimientos():
+def _consulta_movimientos():
+    """Movimientos de stock con los filtros del pedido (listado y exportación)"""
     fecha_desde = request.args.get('fecha_desde')
     fecha_hasta = request.args.get('fecha_hasta')
     tipo = request.args.get('tipo')
     producto_id = request.args.get('producto_id')
     
-    query = MovimientoStock.query.join(MovimientoStock.variante)
+    consulta = select(
+        MovimientoStock.id,
+        MovimientoStock.fecha,
+        MovimientoStock.tipo,
+        MovimientoStock.cantidad,
+        MovimientoStock.motivo,
+        MovimientoStock.usuario,
+        Variante.talle,
+        Variante.sku,
+        Producto.nombre.label('producto_nombre')
+    ).join(Variante, MovimientoStock.variante_id == Variante.id)\
+        .join(Producto, Variante.producto_id == Producto.id)
     
-    if fecha_desde:
-        query = query.filter(MovimientoStock.fecha >= fecha_desde)
-    if fecha_hasta:
-        query = query.filter(MovimientoStock.fecha <= fecha_hasta)
+    consulta = filtrar_fechas(consulta, MovimientoStock.fecha, fecha_desde, fecha_hasta)
     if tipo:
-        query = query.filter(MovimientoStock.tipo == tipo)
+        consulta = consulta.where(MovimientoStock.tipo == tipo)
     if producto_id:
-        query = query.filter(Variante.producto_id == producto_id)
+        consulta = consulta.where(Variante.producto_id == producto_id)
     
-    movimientos = query.options(
-        db.joinedload(MovimientoStock.variante).joinedload(Variante.producto)
-    ).order_by(MovimientoStock.fecha.desc()).all()
+    filtros = {
+        'fecha_desde': fecha_desde,
+        'fecha_hasta': fecha_hasta,
+        'tipo': tipo,
+        'producto_id': producto_id
+    }
+    return consulta, filtros
+
+@bp.route('/movimientos')
+@login_required
+@usar_replica
+def movimientos():
+    consulta, filtros = _consulta_movimientos()
+    pagina = paginar('movimientos-stock', consulta, MovimientoStock.fecha, MovimientoStock.id,
+                     cursor=request.args.get('despues'), filtros=filtros)
     
     productos = Producto.query.order_by(Producto.nombre).all()
     
     return render_template('stock/movimientos.html', 
-                        movimientos=movimientos,
+                        movimientos=pagina.items,
+                        pagina=pagina,
                         productos=productos,
-                        filtros={
-                            'fecha_desde': fecha_desde,
-                            'fecha_hasta': fecha_hasta,
-                            'tipo': tipo,
-                            'producto_id': producto_id
-                        })
\ No newline at end of file
+                        filtros=filtros)
+
+@bp.route('/movimientos/exportar')
+@login_required
+@usar_replica
+def exportar_movimientos():
+    consulta, _ = _consulta_movimientos()
+    return respuesta_csv('movimientos_stock', consulta.order_by(MovimientoStock.fecha, MovimientoStock.id), [
+        ('ID', 'id'),
+        ('Fecha', 'fecha'),
+        ('Producto', 'producto_nombre'),
+        ('Talle', 'talle'),
+        ('SKU', 'sku'),
+        ('Tipo', 'tipo'),
+        ('Cantidad', 'cantidad'),
+        ('Motivo', 'motivo'),
+        ('Usuario', 'usuario')
+    ])
@@ -1,7 +1,14 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
-from models import db, Venta, VentaItem, Variante, Cliente, MovimientoStock, Caja, MovimientoCaja, Producto
+from datetime import datetime, timedelta
+from models import db, Venta, VentaItem, Variante, Cliente, MovimientoStock, Caja, MovimientoCaja, Producto, ResumenVentaDiario, Club, Categoria
+from sqlalchemy import select
 from forms import VentaForm
+from services.ventas import registrar_venta
+from services.listados import filtrar_fechas, paginar, parsear_fecha
+from services.resumen import totales
+from services.exportar import respuesta_csv
+from services.replica import usar_replica
 
 bp = Blueprint('ventas', __name__, url_prefix='/ventas')
 
@@ -9,7 +16,6 @@ bp = Blueprint('ventas', __name__, url_prefix='/ventas')
 @login_required
 def nueva():
     form = VentaForm()
-    form.cliente_id.choices = [(0, 'Cliente ocasional')] + [(c.id, c.nombre) for c in Cliente.query.order_by(Cliente.nombre)]
     
     if request.method == 'POST':
         items = request.form.getlist('items[]')
@@ -18,77 +24,27 @@ def nueva():
             flash('Debe agregar al menos un producto a la venta', 'danger')
             return render_template('ventas/nueva.html', form=form)
         
-        venta = Venta(
-            cliente_id=form.cliente_id.data if form.cliente_id.data != 0 else None,
-            tipo_venta='fisica',
-            total=0
-        )
-        db.session.add(venta)
-        db.session.flush()
+        if not form.validate():
+            for errores in form.errors.values():
+                flash(errores[0], 'danger')
+            return render_template('ventas/nueva.html', form=form)
         
-        total_venta = 0
-        items_validos = 0
+        venta, advertencias = registrar_venta(
+            items,
+            cliente_id=form.cliente_id.data or None,
+            usuario=current_user.username
+        )
         
-        for item in items:
-            try:
-                variante_id, cantidad = map(int, item.split('_'))
-                variante = Variante.query.get(variante_id)
-                
-                if not variante or cantidad <= 0:
-                    continue
-                
-                if variante.stock < cantidad:
-                    flash(f'Stock insuficiente para {variante.producto.nombre} - Talle: {variante.talle}', 'warning')
-                    continue
-                
-                venta_item = VentaItem(
-                    venta_id=venta.id,
-                    variante_id=variante.id,
-                    cantidad=cantidad,
-                    precio_unitario=variante.precio,
-                    subtotal=variante.precio * cantidad
-                )
-                db.session.add(venta_item)
-                
-                movimiento = MovimientoStock(
-                    variante_id=variante.id,
-                    tipo='salida',
-                    cantidad=cantidad,
-                    motivo=f'Venta #{venta.id}',
-                    usuario=current_user.username
-                )
-                db.session.add(movimiento)
-                
-                total_venta += venta_item.subtotal
-                items_validos += 1
-                
-            except ValueError:
-                continue
+        for advertencia in advertencias:
+            flash(advertencia, 'warning')
         
-        if items_validos == 0:
+        if venta is None:
             db.session.rollback()
             flash('No se pudo procesar la venta. Verifique los productos seleccionados.', 'danger')
             return render_template('ventas/nueva.html', form=form)
         
-        venta.total = total_venta
-        
-        caja = Caja.query.first()
-        if not caja:
-            caja = Caja(nombre="Caja Principal", saldo=0)
-            db.session.add(caja)
-        
-        caja.saldo += total_venta
-        movimiento = MovimientoCaja(
-            caja_id=caja.id,
-            tipo='ingreso',
-            monto=total_venta,
-            motivo=f'Venta #{venta.id}'
-        )
-        db.session.add(movimiento)
-        venta.movimiento_caja_id = movimiento.id
-        
         db.session.commit()
-        flash(f'Venta registrada exitosamente! Total: ${total_venta:.2f}', 'success')
+        flash(f'Venta registrada exitosamente! Total: ${venta.total:.2f}', 'success')
         return redirect(url_for('ventas.detalle', venta_id=venta.id))
     
     productos = Producto.query.options(
@@ -107,34 +63,98 @@ def detalle(venta_id):
     
     return render_template('ventas/detalle.html', venta=venta)
 
-@bp.route('/')
-@login_required
-def listar():
+def _consulta_listado():
+    """Consulta de ventas con los filtros del pedido (listado y exportación)"""
     fecha_desde = request.args.get('fecha_desde')
     fecha_hasta = request.args.get('fecha_hasta')
     cliente_id = request.args.get('cliente_id')
     tipo_venta = request.args.get('tipo_venta')
     
-    query = Venta.query
+    consulta = select(
+        Venta.id,
+        Venta.fecha_venta,
+        Venta.total,
+        Venta.tipo_venta,
+        Venta.estado,
+        Cliente.nombre.label('cliente_nombre')
+    ).outerjoin(Cliente, Venta.cliente_id == Cliente.id)
     
-    if fecha_desde:
-        query = query.filter(Venta.fecha_venta >= fecha_desde)
-    if fecha_hasta:
-        query = query.filter(Venta.fecha_venta <= fecha_hasta)
+    consulta = filtrar_fechas(consulta, Venta.fecha_venta, fecha_desde, fecha_hasta)
     if cliente_id:
-        query = query.filter(Venta.cliente_id == cliente_id)
+        consulta = consulta.where(Venta.cliente_id == cliente_id)
     if tipo_venta:
-        query = query.filter(Venta.tipo_venta == tipo_venta)
+        consulta = consulta.where(Venta.tipo_venta == tipo_venta)
     
-    ventas = query.order_by(Venta.fecha_venta.desc()).all()
-    clientes = Cliente.query.order_by(Cliente.nombre).all()
+    filtros = {
+        'fecha_desde': fecha_desde,
+        'fecha_hasta': fecha_hasta,
+        'cliente_id': cliente_id,
+        'tipo_venta': tipo_venta
+    }
+    return consulta, filtros
+
+@bp.route('/')
+@login_required
+@usar_replica
+def listar():
+    consulta, filtros = _consulta_listado()
+    pagina = paginar('ventas', consulta, Venta.fecha_venta, Venta.id,
+                     cursor=request.args.get('despues'), filtros=filtros)
+    # Solo el cliente filtrado, para mostrar su nombre en el buscador
+    cliente = db.session.get(Cliente, int(filtros['cliente_id'])) if (filtros['cliente_id'] or '').isdigit() else None
     
     return render_template('ventas/listar.html', 
-                        ventas=ventas,
-                        clientes=clientes,
+                        ventas=pagina.items,
+                        pagina=pagina,
+                        cliente=cliente,
+                        filtros=filtros)
+
+@bp.route('/exportar')
+@login_required
+@usar_replica
+def exportar():
+    consulta, _ = _consulta_listado()
+    return respuesta_csv('ventas', consulta.order_by(Venta.fecha_venta, Venta.id), [
+        ('ID', 'id'),
+        ('Fecha', 'fecha_venta'),
+        ('Cliente', 'cliente_nombre'),
+        ('Tipo', 'tipo_venta'),
+        ('Estado', 'estado'),
+        ('Total', 'total')
+    ])
+
+@bp.route('/resumen')
+@login_required
+@usar_replica
+def resumen():
+    hoy = datetime.utcnow().date()
+    fecha_desde = parsear_fecha(request.args.get('fecha_desde'))
+    fecha_hasta = parsear_fecha(request.args.get('fecha_hasta'))
+    desde = fecha_desde.date() if fecha_desde else hoy - timedelta(days=29)
+    hasta = fecha_hasta.date() if fecha_hasta else hoy
+    
+    # Lee solo el resumen diario: el costo depende de los días, no de las ventas
+    filas = db.session.execute(
+        select(
+            ResumenVentaDiario.fecha,
+            Club.nombre.label('club'),
+            Categoria.nombre.label('categoria'),
+            ResumenVentaDiario.tipo_venta,
+            ResumenVentaDiario.unidades,
+            ResumenVentaDiario.recaudacion,
+            ResumenVentaDiario.tickets
+        ).join(Club, ResumenVentaDiario.club_id == Club.id)
+        .join(Categoria, ResumenVentaDiario.categoria_id == Categoria.id)
+        .where(ResumenVentaDiario.fecha >= desde, ResumenVentaDiario.fecha <= hasta)
+        .order_by(ResumenVentaDiario.fecha.desc(), Club.nombre, Categoria.nombre)
+    ).all()
+    unidades, recaudacion = totales(desde, hasta)
+    
+    return render_template('ventas/resumen.html',
+                        filas=filas,
+                        unidades=unidades,
+                        recaudacion=recaudacion,
                         filtros={
-                            'fecha_desde': fecha_desde,
-                            'fecha_hasta': fecha_hasta,
-                            'cliente_id': cliente_id,
-                            'tipo_venta': tipo_venta
-                        })
\ No newline at end of file
+                            'fecha_desde': desde.isoformat(),
+                            'fecha_hasta': hasta.isoformat()
+                        })
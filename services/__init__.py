@@ -0,0 +1,35 @@
+from .ventas import registrar_venta, parsear_items
+from .stock import aplicar_movimientos, registrar_movimiento, fijar_stock, StockInsuficiente, StockConflicto
+from .caja import obtener_caja, saldo_caja, ultimo_cierre, registrar_cierre, consolidar_si_corresponde
+from .conciliacion import conciliar, tomar_snapshot, stock_a_fecha
+from .listados import Pagina, PaginaNumerada, paginar, paginar_por_numero, filtrar_fechas
+from . import resumen  # registra los eventos que mantienen ventas_resumen_diario
+from .metricas import metricas_dashboard
+from .busqueda import IndiceBusqueda, indice_actual
+from .skus import consultar_sku, consultar_skus
+from .exportar import filas_csv, respuesta_csv
+from .importar import importar_catalogo, ErrorImportacion
+from .precios import previsualizar, ajustar_precios, AjusteInvalido
+from .replica import usar_replica
+from .usuarios import UsuarioSesion, cargar_usuario
+from .consultas import cacheada, opciones
+from .clientes import buscar_clientes, existe_cliente
+
+__all__ = [
+    'registrar_venta', 'parsear_items',
+    'aplicar_movimientos', 'registrar_movimiento', 'fijar_stock', 'StockInsuficiente', 'StockConflicto',
+    'obtener_caja', 'saldo_caja', 'ultimo_cierre', 'registrar_cierre', 'consolidar_si_corresponde',
+    'conciliar', 'tomar_snapshot', 'stock_a_fecha',
+    'Pagina', 'PaginaNumerada', 'paginar', 'paginar_por_numero', 'filtrar_fechas',
+    'resumen',
+    'metricas_dashboard',
+    'IndiceBusqueda', 'indice_actual',
+    'consultar_sku', 'consultar_skus',
+    'filas_csv', 'respuesta_csv',
+    'importar_catalogo', 'ErrorImportacion',
+    'previsualizar', 'ajustar_precios', 'AjusteInvalido',
+    'usar_replica',
+    'UsuarioSesion', 'cargar_usuario',
+    'cacheada', 'opciones',
+    'buscar_clientes', 'existe_cliente'
+]
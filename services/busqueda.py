@@ -0,0 +1,275 @@
+import heapq
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from flask import current_app, has_app_context
+from sqlalchemy import or_, select
+from models import db, Producto, Variante, Club
+from services.cambios import al_confirmar
+
+LIMITE_RESULTADOS = 10
+
+# Reconstrucción completa periódica: con varios procesos cada índice solo ve
+# sus propias escrituras, así que el resto se incorpora a lo sumo tras este plazo
+BUSQUEDA_TTL = 300
+
+
+def normalizar(texto):
+    """Minúsculas y sin acentos, para comparar 'Atlético' con 'atletico'"""
+    texto = unicodedata.normalize('NFKD', (texto or '').lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def _trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _prefijos(texto):
+    """Prefijos de 1 y 2 letras de cada palabra, para términos cortos"""
+    prefijos = set()
+    for palabra in texto.replace('-', ' ').split():
+        prefijos.add(palabra[:1])
+        prefijos.add(palabra[:2])
+    return prefijos
+
+
+def _indexar(entradas, claves, entrada):
+    entradas[entrada.id] = entrada
+    for clave in entrada.claves:
+        claves[clave].add(entrada.id)
+
+
+class _Entrada:
+    __slots__ = ('id', 'producto_id', 'club_id', 'nombre', 'club', 'talle', 'sku', 'precio', 'stock',
+                 'n_nombre', 'n_club', 'n_sku', 'claves')
+
+    def __init__(self, fila):
+        self.id = fila.id
+        self.producto_id = fila.producto_id
+        self.club_id = fila.club_id
+        self.nombre = fila.nombre
+        self.club = fila.club
+        self.talle = fila.talle
+        self.sku = fila.sku
+        self.precio = fila.precio
+        self.stock = fila.stock or 0
+        self.n_nombre = normalizar(fila.nombre)
+        self.n_club = normalizar(fila.club)
+        self.n_sku = normalizar(fila.sku)
+        self.claves = set()
+        for texto in (self.n_nombre, self.n_club, self.n_sku):
+            self.claves |= _trigramas(texto) | _prefijos(texto)
+
+    def coincide(self, termino):
+        return termino in self.n_nombre or termino in self.n_club or termino in self.n_sku
+
+    def puntaje(self, termino):
+        if self.n_sku == termino:
+            return 100
+        if self.n_sku.startswith(termino):
+            return 80
+        if self.n_nombre.startswith(termino):
+            return 65
+        if any(p.startswith(termino) for p in self.n_nombre.split()):
+            return 60
+        if self.n_club.startswith(termino):
+            return 50
+        if termino in self.n_sku:
+            return 40
+        return 30
+
+    def como_resultado(self):
+        return {
+            'id': self.id,
+            'text': f"{self.nombre} - {self.club} ({self.talle}) - SKU: {self.sku} - Stock: {self.stock}",
+            'precio': self.precio,
+            'stock': self.stock
+        }
+
+
+def _consulta_variantes():
+    return select(
+        Variante.id,
+        Variante.producto_id,
+        Variante.talle,
+        Variante.sku,
+        Variante.precio,
+        Variante.stock,
+        Producto.nombre,
+        Producto.club_id,
+        Club.nombre.label('club')
+    ).join(Producto, Variante.producto_id == Producto.id)\
+        .join(Club, Producto.club_id == Club.id)
+
+
+class IndiceBusqueda:
+    """Índice en memoria de variantes por nombre de producto, club y SKU.
+
+    Cada entrada se indexa por trigramas (términos de 3+ letras) y por prefijos de
+    1-2 letras de cada palabra. Se construye en el primer pedido de cada proceso
+    y se actualiza de forma incremental con los commits que tocan variantes,
+    productos o clubes: las filas afectadas se recargan, con una sola consulta,
+    en la siguiente búsqueda.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Una sola reconstrucción a la vez; se hace fuera de _lock
+        self._carga = threading.Lock()
+        self._entradas = {}
+        self._claves = defaultdict(set)
+        self._construido = 0.0
+        self._completo = True
+        self._pendientes = {'variantes': set(), 'productos': set(), 'clubes': set()}
+
+    # -- mantenimiento -----------------------------------------------------
+
+    def _agregar(self, entrada):
+        _indexar(self._entradas, self._claves, entrada)
+
+    def _quitar(self, variante_id):
+        entrada = self._entradas.pop(variante_id, None)
+        if entrada is None:
+            return
+        for clave in entrada.claves:
+            ids = self._claves.get(clave)
+            if ids is not None:
+                ids.discard(variante_id)
+                if not ids:
+                    del self._claves[clave]
+
+    def reconstruir(self, esperar=True):
+        """Carga todas las variantes en diccionarios nuevos y los reemplaza de una vez.
+
+        La consulta y la indexación se hacen sin tomar _lock: mientras tanto las
+        búsquedas usan el índice anterior. Con esperar=False no hace nada si otro
+        hilo ya está reconstruyendo.
+        """
+        construido = self._construido
+        if not self._carga.acquire(blocking=esperar):
+            return
+        try:
+            if self._construido != construido:
+                # Otro hilo terminó una reconstrucción mientras se esperaba
+                return
+            with self._lock:
+                # Los cambios confirmados durante la carga quedan anotados y
+                # se recargan después del reemplazo
+                self._completo = False
+                for ids in self._pendientes.values():
+                    ids.clear()
+
+            entradas, claves = {}, defaultdict(set)
+            for fila in db.session.execute(_consulta_variantes()):
+                _indexar(entradas, claves, _Entrada(fila))
+
+            with self._lock:
+                self._entradas, self._claves = entradas, claves
+                self._construido = time.monotonic()
+        finally:
+            self._carga.release()
+
+    def _aplicar_pendientes(self):
+        variantes = self._pendientes['variantes']
+        productos = self._pendientes['productos']
+        clubes = self._pendientes['clubes']
+        if not (variantes or productos or clubes):
+            return
+
+        afectadas = set(variantes)
+        afectadas.update(e.id for e in self._entradas.values()
+                         if e.producto_id in productos or e.club_id in clubes)
+        condiciones = []
+        if variantes:
+            condiciones.append(Variante.id.in_(variantes))
+        if productos:
+            condiciones.append(Producto.id.in_(productos))
+        if clubes:
+            condiciones.append(Club.id.in_(clubes))
+
+        filas = db.session.execute(_consulta_variantes().where(or_(*condiciones))).all()
+        for variante_id in afectadas:
+            self._quitar(variante_id)
+        for fila in filas:
+            self._quitar(fila.id)
+            self._agregar(_Entrada(fila))
+
+        variantes.clear()
+        productos.clear()
+        clubes.clear()
+
+    def registrar_cambios(self, cambios):
+        """Anota las filas a recargar; None en ids obliga a reconstruir todo"""
+        with self._lock:
+            if self._completo:
+                # Todavía no se construyó (o ya hay una reconstrucción pendiente)
+                return
+            for tabla in self._pendientes:
+                cambio = cambios.get(tabla)
+                if cambio is None:
+                    continue
+                if cambio['ids'] is None:
+                    self._completo = True
+                else:
+                    self._pendientes[tabla].update(cambio['ids'])
+
+    def _vigente(self):
+        ttl = current_app.config.get('BUSQUEDA_TTL', BUSQUEDA_TTL)
+        if self._completo or time.monotonic() - self._construido > ttl:
+            # Solo se espera si todavía no hay ningún índice para responder
+            self.reconstruir(esperar=not self._construido)
+        with self._lock:
+            # Durante una reconstrucción los pendientes se aplican al índice nuevo
+            if not self._carga.locked():
+                self._aplicar_pendientes()
+
+    # -- consulta ----------------------------------------------------------
+
+    def buscar(self, termino, limite=LIMITE_RESULTADOS):
+        """Variantes que contienen el término, ordenadas por relevancia y stock"""
+        termino = normalizar(termino).strip()
+        if not termino:
+            return []
+
+        self._vigente()
+        with self._lock:
+            if len(termino) >= 3:
+                conjuntos = [self._claves.get(t, ()) for t in _trigramas(termino)]
+            else:
+                conjuntos = [self._claves.get(termino, ())]
+            conjuntos.sort(key=len)
+            if not conjuntos or not conjuntos[0]:
+                return []
+
+            candidatos = set(conjuntos[0]).intersection(*conjuntos[1:])
+            entradas = [self._entradas[i] for i in candidatos]
+            # Los trigramas pueden dar falsos positivos: se verifica la subcadena
+            entradas = [e for e in entradas if e.coincide(termino)] if len(termino) >= 3 else entradas
+
+            mejores = heapq.nsmallest(limite, entradas, key=lambda e: (
+                -e.puntaje(termino), e.stock <= 0, e.nombre, e.talle
+            ))
+            return [e.como_resultado() for e in mejores]
+
+
+def indice_actual():
+    return current_app.extensions['indice_busqueda']
+
+
+def init_app(app):
+    indice = app.extensions['indice_busqueda'] = IndiceBusqueda()
+
+    if app.config.get('BUSQUEDA_BACKEND', 'memoria') == 'memoria':
+        @app.before_request
+        def _construir_indice():
+            # En el primer pedido del proceso, no en la primera búsqueda (y no
+            # al iniciar la app, que también corre en los comandos de migración)
+            if not indice._construido:
+                indice.reconstruir()
+
+
+@al_confirmar
+def _actualizar_indice(cambios):
+    if has_app_context() and 'indice_busqueda' in current_app.extensions:
+        indice_actual().registrar_cambios(cambios)
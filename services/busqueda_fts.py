@@ -0,0 +1,237 @@
+from flask import current_app, has_app_context
+from sqlalchemy import column, delete, event, exc, insert, inspect, or_, select, table, text
+from sqlalchemy.orm import Session
+from models import db, Producto, Variante, Club
+from services.cambios import pendientes
+from services.busqueda import LIMITE_RESULTADOS
+
+TABLA = 'busqueda_variantes'
+
+# Columnas de variantes que no forman parte del texto indexado: si un commit
+# solo cambió estas, no hace falta resincronizar la tabla de búsqueda
+_COLUMNAS_SIN_TEXTO = {'stock', 'version', 'precio', 'stock_minimo'}
+
+# Columnas de productos que sí forman parte del texto indexado
+_COLUMNAS_PRODUCTO_TEXTO = {'nombre', 'club_id'}
+
+# En MySQL sin índice FULLTEXT se busca con LIKE sobre la tabla desnormalizada
+_mysql_sin_fulltext = False
+
+
+def _clave(dialecto):
+    """FTS5 usa rowid = variante_id; en MySQL es la clave primaria"""
+    return 'rowid' if dialecto == 'sqlite' else 'variante_id'
+
+
+def _tabla(dialecto):
+    return table(TABLA, column(_clave(dialecto)), column('nombre'), column('club'), column('sku'))
+
+
+def crear_tabla(conexion):
+    """Crea la tabla de búsqueda del motor actual si no existe"""
+    global _mysql_sin_fulltext
+    dialecto = conexion.dialect.name
+    if dialecto == 'sqlite':
+        # tokenizer trigram: MATCH y LIKE '%x%' indexados, igual que el ILIKE original
+        conexion.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA} "
+            f"USING fts5(nombre, club, sku, tokenize='trigram')"
+        ))
+    elif dialecto == 'mysql':
+        columnas = ("variante_id INTEGER NOT NULL PRIMARY KEY, nombre VARCHAR(100), "
+                    "club VARCHAR(50), sku VARCHAR(50)")
+        try:
+            conexion.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {TABLA} ({columnas}, "
+                f"FULLTEXT KEY ft_{TABLA} (nombre, club, sku) WITH PARSER ngram) ENGINE=InnoDB"
+            ))
+        except exc.DBAPIError:
+            conexion.execute(text(f"CREATE TABLE IF NOT EXISTS {TABLA} ({columnas}) ENGINE=InnoDB"))
+            _mysql_sin_fulltext = True
+    else:
+        raise RuntimeError(f'Búsqueda de texto completo no soportada para {dialecto}')
+
+
+def init_app(app):
+    """Con BUSQUEDA_BACKEND=fts crea (y puebla) la tabla de búsqueda si todavía no existe.
+
+    Sin ella cada commit que toca variantes, productos o clubes fallaría al
+    sincronizar. Si la base aún no tiene el esquema (antes de `flask db
+    upgrade`) la tabla queda vacía y se completa con las altas siguientes o
+    con `flask busqueda-fts`.
+    """
+    if app.config.get('BUSQUEDA_BACKEND') != 'fts':
+        return
+    with app.app_context():
+        try:
+            with db.engine.begin() as conexion:
+                inspector = inspect(conexion)
+                if inspector.has_table(TABLA):
+                    return
+                crear_tabla(conexion)
+                if inspector.has_table(Variante.__tablename__):
+                    sincronizar(conexion, completo=True)
+        except (exc.DBAPIError, RuntimeError) as e:
+            app.logger.warning('No se pudo crear la tabla de búsqueda %s: %s', TABLA, e)
+
+
+def _origen(condicion=None):
+    consulta = select(Variante.id, Producto.nombre, Club.nombre, Variante.sku)\
+        .join(Producto, Variante.producto_id == Producto.id)\
+        .join(Club, Producto.club_id == Club.id)
+    if condicion is not None:
+        consulta = consulta.where(condicion)
+    return consulta
+
+
+def sincronizar(conexion, variantes=(), productos=(), clubes=(), completo=False):
+    """Reescribe en la tabla de búsqueda las filas de las variantes afectadas"""
+    dialecto = conexion.dialect.name
+    tabla = _tabla(dialecto)
+    clave = tabla.c[_clave(dialecto)]
+    columnas = [_clave(dialecto), 'nombre', 'club', 'sku']
+
+    if completo:
+        conexion.execute(delete(tabla))
+        conexion.execute(insert(tabla).from_select(columnas, _origen()))
+        return
+
+    condiciones = []
+    if variantes:
+        condiciones.append(Variante.id.in_(variantes))
+    if productos:
+        condiciones.append(Producto.id.in_(productos))
+    if clubes:
+        condiciones.append(Club.id.in_(clubes))
+    if not condiciones:
+        return
+
+    afectadas = set(variantes)
+    if productos or clubes:
+        afectadas.update(conexion.execute(
+            select(Variante.id).join(Producto, Variante.producto_id == Producto.id).where(or_(
+                Producto.id.in_(productos), Producto.club_id.in_(clubes)
+            ))
+        ).scalars())
+    if afectadas:
+        conexion.execute(delete(tabla).where(clave.in_(afectadas)))
+    conexion.execute(insert(tabla).from_select(columnas, _origen(or_(*condiciones))))
+
+
+@event.listens_for(Session, 'before_commit')
+def _sincronizar_antes_de_confirmar(session):
+    """Mantiene la tabla de búsqueda en la misma transacción que la escritura"""
+    if not has_app_context() or current_app.config.get('BUSQUEDA_BACKEND') != 'fts':
+        return
+    session.flush()
+
+    cambios = pendientes(session)
+    variantes = cambios.get('variantes')
+    if variantes and variantes['columnas'] is not None and variantes['columnas'] <= _COLUMNAS_SIN_TEXTO:
+        variantes = None
+    productos = cambios.get('productos')
+    if productos and productos['columnas'] is not None and not productos['columnas'] & _COLUMNAS_PRODUCTO_TEXTO:
+        productos = None
+    relevantes = {
+        'variantes': variantes,
+        'productos': productos,
+        'clubes': cambios.get('clubes'),
+    }
+    if not any(relevantes.values()):
+        return
+
+    sincronizar(
+        session.connection(),
+        variantes=(relevantes['variantes'] or {}).get('ids') or (),
+        productos=(relevantes['productos'] or {}).get('ids') or (),
+        clubes=(relevantes['clubes'] or {}).get('ids') or (),
+        completo=any(c is not None and c['ids'] is None for c in relevantes.values())
+    )
+
+
+def buscar(termino, limite=LIMITE_RESULTADOS):
+    """Búsqueda en la tabla de texto completo; stock y precio salen de variantes"""
+    global _mysql_sin_fulltext
+    termino = termino.strip()
+    if not termino:
+        return []
+
+    dialecto = db.session.get_bind().dialect.name
+    tabla = _tabla(dialecto)
+    clave = tabla.c[_clave(dialecto)]
+    patron = f"%{termino.replace('%', '').replace('_', '')}%"
+
+    consulta = select(
+        Variante.id, Variante.talle, Variante.sku, Variante.precio, Variante.stock,
+        Producto.nombre, Club.nombre.label('club')
+    ).select_from(tabla)\
+        .join(Variante, Variante.id == clave)\
+        .join(Producto, Variante.producto_id == Producto.id)\
+        .join(Club, Producto.club_id == Club.id)
+
+    if dialecto == 'sqlite':
+        if len(termino) >= 3:
+            frase = '"' + termino.replace('"', '""') + '"'
+            consulta = consulta.where(text(f'{TABLA} MATCH :frase').bindparams(frase=frase))\
+                .order_by(Variante.stock <= 0, text(f'bm25({TABLA})'))
+        else:
+            # El tokenizer trigram no indexa términos de menos de 3 letras
+            consulta = consulta.where(or_(
+                tabla.c.nombre.like(patron), tabla.c.club.like(patron), tabla.c.sku.like(patron)
+            )).order_by(Variante.stock <= 0, Producto.nombre, Variante.talle)
+        filas = db.session.execute(consulta.limit(limite)).all()
+    else:
+        filas = None
+        if not _mysql_sin_fulltext:
+            coincidencia = 'MATCH (nombre, club, sku) AGAINST (:frase IN BOOLEAN MODE)'
+            try:
+                filas = db.session.execute(
+                    consulta.where(text(coincidencia))
+                    .order_by(Variante.stock <= 0, text(coincidencia + ' DESC'))
+                    .limit(limite),
+                    {'frase': '"' + termino.replace('"', '') + '"'}
+                ).all()
+            except exc.DBAPIError:
+                _mysql_sin_fulltext = True
+        if filas is None:
+            filas = db.session.execute(consulta.where(or_(
+                tabla.c.nombre.like(patron), tabla.c.club.like(patron), tabla.c.sku.like(patron)
+            )).order_by(Variante.stock <= 0, Producto.nombre, Variante.talle).limit(limite)).all()
+
+    return [
+        {
+            'id': f.id,
+            'text': f"{f.nombre} - {f.club} ({f.talle}) - SKU: {f.sku} - Stock: {f.stock}",
+            'precio': f.precio,
+            'stock': f.stock
+        }
+        for f in filas
+    ]
+
+
+def buscar_ilike(termino):
+    """Consulta original de /buscar_productos (ILIKE sobre Producto ⋈ Club ⋈ Variante).
+
+    Se conserva como backend 'ilike' y como referencia para benchmarks.
+    """
+    productos = Producto.query.join(Club).join(Variante).filter(
+        or_(
+            Producto.nombre.ilike(f'%{termino}%'),
+            Variante.sku.ilike(f'%{termino}%'),
+            Club.nombre.ilike(f'%{termino}%')
+        )
+    ).options(
+        db.joinedload(Producto.variantes),
+        db.joinedload(Producto.club)
+    ).limit(10).all()
+
+    resultados = []
+    for p in productos:
+        for v in p.variantes:
+            resultados.append({
+                'id': v.id,
+                'text': f"{p.nombre} - {p.club.nombre} ({v.talle}) - SKU: {v.sku} - Stock: {v.stock}",
+                'precio': v.precio,
+                'stock': v.stock
+            })
+    return resultados
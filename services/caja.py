@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import case, func, select
+from sqlalchemy.exc import IntegrityError
+from models import db, Caja, MovimientoCaja, CierreCaja
+
+# Cantidad de movimientos posteriores al último cierre a partir de la cual
+# las escrituras agregan un punto de control automático (configurable con
+# CAJA_CHECKPOINT_CADA)
+CHECKPOINT_CADA = 500
+
+# Los cierres automáticos no incluyen movimientos más nuevos que este margen,
+# para no dejar afuera transacciones que aún no confirmaron (MySQL)
+MARGEN_CHECKPOINT = timedelta(seconds=30)
+
+
+def _monto_firmado():
+    return case((MovimientoCaja.tipo == 'ingreso', MovimientoCaja.monto), else_=-MovimientoCaja.monto)
+
+
+def obtener_caja():
+    """Devuelve la caja principal, creándola si todavía no existe"""
+    caja = Caja.query.first()
+    if not caja:
+        caja = Caja(nombre="Caja Principal", saldo=0)
+        db.session.add(caja)
+        db.session.flush()
+    return caja
+
+
+def ultimo_cierre(caja_id):
+    return CierreCaja.query.filter_by(caja_id=caja_id)\
+        .order_by(CierreCaja.ultimo_movimiento_id.desc(), CierreCaja.id.desc())\
+        .first()
+
+
+def _base(caja_id):
+    cierre = ultimo_cierre(caja_id)
+    if cierre is None:
+        return 0, 0.0
+    return cierre.ultimo_movimiento_id, cierre.saldo
+
+
+def _acumulado(caja_id, desde_id, hasta_id=None):
+    """(cantidad, suma firmada) de los movimientos con desde_id < id <= hasta_id"""
+    consulta = select(
+        func.count(MovimientoCaja.id),
+        func.coalesce(func.sum(_monto_firmado()), 0)
+    ).where(MovimientoCaja.caja_id == caja_id, MovimientoCaja.id > desde_id)
+    if hasta_id is not None:
+        consulta = consulta.where(MovimientoCaja.id <= hasta_id)
+    return db.session.execute(consulta).one()
+
+
+def saldo_caja(caja_id):
+    """Saldo vigente: último punto de control más los movimientos posteriores.
+
+    Solo lee: los puntos de control los agregan las escrituras
+    (consolidar_si_corresponde) o `flask caja-consolidar`.
+    """
+    base_id, base_saldo = _base(caja_id)
+    _, delta = _acumulado(caja_id, base_id)
+    return base_saldo + delta
+
+
+def consolidar_si_corresponde(caja_id, movimiento_id):
+    """Agrega un cierre automático cada CAJA_CHECKPOINT_CADA movimientos.
+
+    Se llama después de insertar el movimiento movimiento_id y solo consulta
+    la base cuando el id es múltiplo de CAJA_CHECKPOINT_CADA, así que no suma
+    consultas a cada venta. Si ese id se saltea (un rollback en MySQL), el
+    cierre llega en el múltiplo siguiente. Queda en la sesión del llamador.
+    """
+    if movimiento_id % current_app.config.get('CAJA_CHECKPOINT_CADA', CHECKPOINT_CADA) == 0:
+        return registrar_cierre(caja_id)
+    return None
+
+
+def registrar_cierre(caja_id, tipo='automatico', usuario=None):
+    """Agrega un punto de control con el saldo acumulado hasta el último movimiento.
+
+    Nunca modifica filas existentes: solo inserta en cierres_caja. Devuelve el
+    cierre creado, o None si no había movimientos nuevos que consolidar o si
+    otra transacción ya registró un cierre hasta el mismo movimiento.
+    """
+    base_id, base_saldo = _base(caja_id)
+
+    limite = select(func.max(MovimientoCaja.id)).where(
+        MovimientoCaja.caja_id == caja_id,
+        MovimientoCaja.id > base_id
+    )
+    if tipo == 'automatico':
+        limite = limite.where(MovimientoCaja.fecha <= datetime.utcnow() - MARGEN_CHECKPOINT)
+    hasta_id = db.session.execute(limite).scalar()
+    if hasta_id is None:
+        return None
+
+    _, delta = _acumulado(caja_id, base_id, hasta_id)
+    cierre = CierreCaja(
+        caja_id=caja_id,
+        tipo=tipo,
+        ultimo_movimiento_id=hasta_id,
+        saldo=base_saldo + delta,
+        usuario=usuario
+    )
+    # (caja_id, ultimo_movimiento_id) es único: un cierre concurrente hasta el
+    # mismo movimiento ya consolidó lo mismo
+    try:
+        with db.session.begin_nested():
+            db.session.add(cierre)
+    except IntegrityError:
+        return None
+    return cierre
@@ -0,0 +1,117 @@
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# Funciones a llamar después de cada commit con las tablas que modificó
+_suscriptores = []
+
+
+def al_confirmar(funcion):
+    """Registra funcion(cambios) para después de cada commit.
+
+    cambios es {nombre_tabla: {'insertados', 'eliminados', 'modificados', 'exacto', 'ids', 'columnas'}};
+    exacto es False cuando no se conoce la cantidad de filas (DELETE o INSERT ... SELECT),
+    ids es None cuando no se conocen las claves primarias afectadas y columnas es
+    None cuando hubo altas, bajas o no se sabe qué columnas se actualizaron.
+    Las sentencias pueden declararlas con execution_options(ids_modificados=...,
+    columnas_modificadas=...). sumas lleva los totales anotados con sumar().
+    """
+    _suscriptores.append(funcion)
+    return funcion
+
+
+def pendientes(session):
+    """Cambios acumulados por la transacción en curso (para hooks previos al commit)"""
+    return session.info.get('cambios', {})
+
+
+def sumar(session, tabla, clave, valor):
+    """Acumula valor en cambios[tabla]['sumas'][clave] y marca la tabla como modificada.
+
+    Para escrituras hechas fuera de la sesión (services.resumen): los
+    suscriptores ajustan sus totales con estas sumas sin volver a consultar.
+    """
+    sumas = _registrar(session, tabla)['sumas']
+    sumas[clave] = sumas.get(clave, 0) + valor
+
+
+def _registrar(session, tabla, insertados=0, eliminados=0, modificados=0, exacto=True, ids=None, columnas=None):
+    cambios = session.info.setdefault('cambios', {})
+    cambio = cambios.setdefault(tabla, {
+        'insertados': 0, 'eliminados': 0, 'modificados': 0, 'exacto': True, 'ids': set(), 'columnas': set(),
+        'sumas': {}
+    })
+    cambio['insertados'] += insertados
+    cambio['eliminados'] += eliminados
+    cambio['modificados'] += modificados
+    cambio['exacto'] = cambio['exacto'] and exacto
+    if ids is None:
+        cambio['ids'] = None
+    elif cambio['ids'] is not None:
+        cambio['ids'].update(ids)
+    if columnas is None:
+        cambio['columnas'] = None
+    elif cambio['columnas'] is not None:
+        cambio['columnas'].update(columnas)
+    return cambio
+
+
+def _id(obj):
+    identidad = inspect(obj).identity
+    return [identidad[0]] if identidad else None
+
+
+def _columnas(obj):
+    return [atributo.key for atributo in inspect(obj).attrs if atributo.history.has_changes()]
+
+
+@event.listens_for(Session, 'after_flush')
+def _cambios_del_flush(session, contexto):
+    for obj in session.new:
+        _registrar(session, obj.__table__.name, insertados=1, ids=_id(obj))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            _registrar(session, obj.__table__.name, modificados=1, ids=_id(obj), columnas=_columnas(obj))
+    for obj in session.deleted:
+        _registrar(session, obj.__table__.name, eliminados=1, ids=_id(obj))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _cambios_de_sentencias(estado):
+    """INSERT/UPDATE/DELETE ejecutados con session.execute(), fuera del flush"""
+    if not (estado.is_insert or estado.is_update or estado.is_delete):
+        return
+    tabla = getattr(estado.statement, 'table', None)
+    if tabla is None:
+        return
+
+    parametros = estado.parameters
+    if not isinstance(parametros, list):
+        parametros = [parametros or {}]
+    ids = estado.execution_options.get('ids_modificados')
+    columnas = estado.execution_options.get('columnas_modificadas')
+    if ids is None and all('id' in p for p in parametros):
+        # Sentencia en bloque por clave primaria: claves y columnas salen de los parámetros
+        ids = [p['id'] for p in parametros]
+        if columnas is None:
+            columnas = set().union(*parametros) - {'id'}
+
+    if estado.is_insert:
+        desde_select = getattr(estado.statement, 'select', None) is not None
+        _registrar(estado.session, tabla.name, insertados=len(parametros), exacto=not desde_select, ids=ids)
+    elif estado.is_update:
+        _registrar(estado.session, tabla.name, modificados=len(parametros), ids=ids, columnas=columnas)
+    else:
+        _registrar(estado.session, tabla.name, exacto=False, ids=ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _notificar(session):
+    cambios = session.info.pop('cambios', None)
+    if cambios:
+        for funcion in _suscriptores:
+            funcion(cambios)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar(session):
+    session.info.pop('cambios', None)
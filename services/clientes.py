@@ -0,0 +1,65 @@
+import re
+from sqlalchemy import and_, event, or_, select
+from models import db, Cliente
+from services.busqueda import normalizar
+
+# Resultados máximos de una búsqueda de clientes
+LIMITE_BUSQUEDA = 20
+
+_NO_DIGITOS = re.compile(r'[^0-9]')
+_TELEFONO = re.compile(r'[0-9\s\-().+]+')
+
+
+def claves_busqueda(nombre, email, telefono):
+    """Columnas *_busqueda de un cliente: nombre sin acentos, email en minúsculas
+    y teléfono solo con dígitos (el formulario los guarda tal como se escriben)"""
+    return {
+        'nombre_busqueda': normalizar(nombre)[:100],
+        'email_busqueda': (email or '').strip().lower()[:100] or None,
+        'telefono_busqueda': _NO_DIGITOS.sub('', telefono or '')[:20] or None,
+    }
+
+
+@event.listens_for(Cliente, 'before_insert')
+@event.listens_for(Cliente, 'before_update')
+def _columnas_busqueda(mapper, conexion, cliente):
+    """Mantiene las columnas *_busqueda para las altas y cambios hechos con el ORM"""
+    for columna, valor in claves_busqueda(cliente.nombre, cliente.email, cliente.telefono).items():
+        setattr(cliente, columna, valor)
+
+
+def _prefijo(columna, texto):
+    """columna empieza con texto, como rango: LIKE no usa el índice en SQLite"""
+    return and_(columna >= texto, columna < texto + '\U0010ffff')
+
+
+def buscar_clientes(termino, limite=LIMITE_BUSQUEDA):
+    """Clientes cuyo nombre, email o teléfono empieza con el término.
+
+    Cada condición es un rango sobre el índice de una columna normalizada
+    (nombre, email y teléfono), así que el costo no depende de la cantidad de
+    clientes.
+    """
+    termino = (termino or '').strip()
+    if not termino:
+        return []
+
+    condiciones = [_prefijo(Cliente.nombre_busqueda, normalizar(termino))]
+    if ' ' not in termino:
+        condiciones.append(_prefijo(Cliente.email_busqueda, termino.lower()))
+    telefono = _NO_DIGITOS.sub('', termino)
+    if telefono and _TELEFONO.fullmatch(termino):
+        condiciones.append(_prefijo(Cliente.telefono_busqueda, telefono))
+
+    filas = db.session.execute(
+        select(Cliente.id, Cliente.nombre, Cliente.email, Cliente.telefono)
+        .where(or_(*condiciones))
+        .order_by(Cliente.nombre_busqueda, Cliente.id)
+        .limit(limite)
+    ).all()
+    return [fila._asdict() for fila in filas]
+
+
+def existe_cliente(cliente_id):
+    """Validación del cliente de una venta: una consulta por clave primaria"""
+    return db.session.execute(select(Cliente.id).where(Cliente.id == cliente_id)).first() is not None
@@ -0,0 +1,129 @@
+from datetime import datetime
+from sqlalchemy import and_, bindparam, case, func, insert, literal, or_, select, update
+from models import db, Variante, MovimientoStock, SnapshotStock
+
+
+def _delta_movimiento():
+    return case((MovimientoStock.tipo == 'entrada', MovimientoStock.cantidad), else_=-MovimientoStock.cantidad)
+
+
+def _ultimos_snapshots():
+    """Subconsulta con el snapshot más reciente de cada variante"""
+    ultimos = select(
+        SnapshotStock.variante_id,
+        func.max(SnapshotStock.id).label('id')
+    ).group_by(SnapshotStock.variante_id).subquery()
+    return select(SnapshotStock).join(ultimos, SnapshotStock.id == ultimos.c.id).subquery()
+
+
+def _stock_libro(hasta_id=None):
+    """Una fila por variante con el stock registrado y el recalculado desde el libro.
+
+    calculado = stock del último snapshot + movimientos posteriores a él. Es una
+    única consulta agrupada sobre todo el catálogo, sin recorrer variantes en Python.
+    """
+    snap = _ultimos_snapshots()
+    condicion = and_(
+        MovimientoStock.variante_id == Variante.id,
+        MovimientoStock.id > func.coalesce(snap.c.ultimo_movimiento_id, 0)
+    )
+    if hasta_id is not None:
+        condicion = and_(condicion, MovimientoStock.id <= hasta_id)
+
+    calculado = func.coalesce(snap.c.stock, 0) + func.coalesce(func.sum(_delta_movimiento()), 0)
+    return select(
+        Variante.id.label('variante_id'),
+        Variante.sku,
+        func.coalesce(Variante.stock, 0).label('stock'),
+        calculado.label('calculado'),
+        func.count(MovimientoStock.id).label('movimientos'),
+        snap.c.id.label('snapshot_id')
+    ).outerjoin(snap, snap.c.variante_id == Variante.id)\
+        .outerjoin(MovimientoStock, condicion)\
+        .group_by(Variante.id, Variante.sku, Variante.stock, snap.c.id, snap.c.stock, snap.c.ultimo_movimiento_id)
+
+
+def conciliar(reparar=False):
+    """Compara Variante.stock con el libro de movimientos y devuelve las diferencias.
+
+    Con reparar=True el libro se toma como fuente de verdad y se corrige
+    Variante.stock con un UPDATE por lotes (solo si no cambió desde la lectura).
+    """
+    consulta = _stock_libro()
+    calculado = consulta.selected_columns.calculado
+    stock = consulta.selected_columns.stock
+    diferencias = [
+        {
+            'variante_id': fila.variante_id,
+            'sku': fila.sku,
+            'stock': fila.stock,
+            'calculado': fila.calculado
+        }
+        for fila in db.session.execute(consulta.having(calculado != stock))
+    ]
+
+    if reparar and diferencias:
+        tabla = Variante.__table__
+        db.session.execute(
+            update(tabla)
+            .where(tabla.c.id == bindparam('b_id'), func.coalesce(tabla.c.stock, 0) == bindparam('b_stock'))
+            .values(stock=bindparam('b_calculado'), version=tabla.c.version + 1),
+            [
+                {'b_id': d['variante_id'], 'b_stock': d['stock'], 'b_calculado': d['calculado']}
+                for d in diferencias
+            ],
+            execution_options={
+                'ids_modificados': [d['variante_id'] for d in diferencias],
+                'columnas_modificadas': ('stock', 'version')
+            }
+        )
+
+    return diferencias
+
+
+def tomar_snapshot():
+    """Consolida el libro en snapshots_stock con un único INSERT ... SELECT.
+
+    Todas las filas comparten el mismo corte (el último movimiento existente) y
+    solo se escriben para variantes con movimientos nuevos o sin snapshot previo.
+    Devuelve la cantidad de snapshots insertados.
+    """
+    hasta_id = db.session.execute(select(func.max(MovimientoStock.id))).scalar() or 0
+    consulta = _stock_libro(hasta_id)
+    libro = consulta.having(or_(
+        consulta.selected_columns.movimientos > 0,
+        consulta.selected_columns.snapshot_id.is_(None)
+    )).subquery()
+
+    resultado = db.session.execute(
+        insert(SnapshotStock).from_select(
+            ['variante_id', 'fecha', 'ultimo_movimiento_id', 'stock'],
+            select(libro.c.variante_id, literal(datetime.utcnow()), literal(hasta_id), libro.c.calculado)
+        )
+    )
+    return resultado.rowcount
+
+
+def stock_a_fecha(sku, fecha):
+    """Stock de un SKU al momento `fecha`: snapshot previo más movimientos hasta esa fecha.
+
+    Devuelve None si el SKU no existe.
+    """
+    variante_id = db.session.execute(select(Variante.id).where(Variante.sku == sku)).scalar()
+    if variante_id is None:
+        return None
+
+    snapshot = SnapshotStock.query.filter(
+        SnapshotStock.variante_id == variante_id,
+        SnapshotStock.fecha <= fecha
+    ).order_by(SnapshotStock.fecha.desc(), SnapshotStock.id.desc()).first()
+    base_id, base_stock = (snapshot.ultimo_movimiento_id, snapshot.stock) if snapshot else (0, 0)
+
+    delta = db.session.execute(
+        select(func.coalesce(func.sum(_delta_movimiento()), 0)).where(
+            MovimientoStock.variante_id == variante_id,
+            MovimientoStock.id > base_id,
+            MovimientoStock.fecha <= fecha
+        )
+    ).scalar()
+    return base_stock + delta
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import Table, select
+from sqlalchemy.sql.util import find_tables
+from models import db
+from services.cambios import al_confirmar, pendientes
+
+# Resultados que se guardan en memoria (se descartan los menos usados)
+CONSULTAS_CACHE_MAX = 256
+
+# Respaldo para despliegues con varios procesos, igual que en services.metricas
+CONSULTAS_CACHE_TTL = 300
+
+_lock = threading.Lock()
+_cache = OrderedDict()  # (sentencia, parámetros, versiones, escalares) -> (filas, expira)
+_versiones = {}         # tabla -> versión; cada commit que la modifica la incrementa
+
+
+def _tablas(consulta):
+    return frozenset(t.name for t in find_tables(consulta, check_columns=True) if isinstance(t, Table))
+
+
+def _filas(resultado, escalares):
+    return tuple(resultado.scalars() if escalares else resultado.all())
+
+
+def _consultar_nueva(consulta, escalares):
+    """Ejecuta en una conexión y transacción propias de la primaria.
+
+    La transacción de la sesión puede haber tomado su instantánea antes de que
+    se leyeran las versiones (REPEATABLE READ en MySQL) y guardaría filas
+    anteriores a un commit bajo la versión nueva. Esta empieza después, así
+    que ve todo commit cuya versión ya se leyó; tampoco pasa por la réplica.
+    """
+    with db.engine.connect() as conexion:
+        return _filas(conexion.execute(consulta), escalares)
+
+
+def cacheada(consulta, escalares=False):
+    """Filas (o escalares) de un SELECT de columnas, desde la caché si ninguna tabla cambió.
+
+    La clave incluye la sentencia compilada, sus parámetros y la versión de cada
+    tabla que lee, así que un commit que modifica una de ellas la deja sin
+    efecto. Si la transacción en curso ya escribió en esas tablas se consulta
+    la base, para ver los cambios propios.
+    """
+    if any(isinstance(d['expr'], type) for d in consulta.column_descriptions):
+        raise ValueError('Solo se cachean consultas de columnas: las entidades quedarían ligadas a una sesión')
+
+    session = db.session()
+    tablas = _tablas(consulta)
+    if session.new or session.dirty or session.deleted or tablas & set(pendientes(session)):
+        # Con cambios propios sin confirmar: de la sesión, sin guardar nada
+        return _filas(session.execute(consulta.execution_options(solo_primaria=True)), escalares)
+
+    compilada = consulta.compile(dialect=db.engine.dialect)
+    ahora = time.monotonic()
+    with _lock:
+        versiones = tuple(sorted((tabla, _versiones.get(tabla, 0)) for tabla in tablas))
+        clave = (str(compilada), repr(sorted(compilada.params.items())), versiones, escalares)
+        entrada = _cache.get(clave)
+        if entrada and entrada[1] > ahora:
+            _cache.move_to_end(clave)
+            return entrada[0]
+
+    # Si un commit cambia estas tablas mientras se consulta, el resultado queda
+    # guardado con las versiones anteriores y ya no se vuelve a usar
+    filas = _consultar_nueva(consulta, escalares)
+    maximo = current_app.config.get('CONSULTAS_CACHE_MAX', CONSULTAS_CACHE_MAX)
+    expira = ahora + current_app.config.get('CONSULTAS_CACHE_TTL', CONSULTAS_CACHE_TTL)
+    with _lock:
+        _cache[clave] = (filas, expira)
+        _cache.move_to_end(clave)
+        while len(_cache) > maximo:
+            _cache.popitem(last=False)
+    return filas
+
+
+def opciones(modelo):
+    """[(id, nombre)] ordenado por nombre, para listas desplegables y filtros"""
+    return [tuple(fila) for fila in cacheada(select(modelo.id, modelo.nombre).order_by(modelo.nombre))]
+
+
+@al_confirmar
+def _incrementar_versiones(cambios):
+    with _lock:
+        for tabla in cambios:
+            _versiones[tabla] = _versiones.get(tabla, 0) + 1
+
+
+def invalidar():
+    with _lock:
+        _cache.clear()
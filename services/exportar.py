@@ -0,0 +1,48 @@
+import csv
+import io
+from datetime import datetime
+from flask import Response, stream_with_context
+from models import db
+
+# Filas por tanda del cursor y por bloque enviado al cliente
+TANDA_EXPORTACION = 1000
+
+
+def _celda(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    return valor
+
+
+def filas_csv(consulta, columnas, tanda=TANDA_EXPORTACION):
+    """Genera el CSV de una consulta select() en bloques de texto.
+
+    columnas es [(encabezado, atributo de la fila)]. Las filas se leen con
+    yield_per, que en MySQL usa un cursor del lado del servidor: la memoria no
+    depende de la cantidad de filas exportadas.
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    # BOM para que Excel reconozca el archivo como UTF-8
+    buffer.write('﻿')
+    escritor.writerow([encabezado for encabezado, _ in columnas])
+
+    resultado = db.session.execute(consulta.execution_options(yield_per=tanda))
+    for particion in resultado.partitions():
+        escritor.writerows([_celda(getattr(fila, atributo)) for _, atributo in columnas] for fila in particion)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def respuesta_csv(nombre, consulta, columnas):
+    """Response que envía el CSV a medida que se genera"""
+    archivo = f"{nombre}_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+    return Response(
+        stream_with_context(filas_csv(consulta, columnas)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{archivo}"'}
+    )
@@ -0,0 +1,214 @@
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, func, insert, select, update
+from models import (db, Club, Categoria, Producto, Variante, Cliente, Venta, VentaItem,
+                    MovimientoStock, MovimientoCaja, Caja)
+from services.clientes import claves_busqueda
+
+# Filas por INSERT en bloque y ventas por transacción
+FILAS_POR_INSERT = 10000
+VENTAS_POR_TRANSACCION = 50000
+
+CLUBES = [
+    ('Boca Juniors', 'Liga Profesional'), ('River Plate', 'Liga Profesional'),
+    ('Racing Club', 'Liga Profesional'), ('Independiente', 'Liga Profesional'),
+    ('San Lorenzo', 'Liga Profesional'), ('Huracán', 'Liga Profesional'),
+    ('Vélez Sarsfield', 'Liga Profesional'), ('Estudiantes', 'Liga Profesional'),
+    ('Gimnasia La Plata', 'Liga Profesional'), ("Newell's Old Boys", 'Liga Profesional'),
+    ('Rosario Central', 'Liga Profesional'), ('Talleres', 'Liga Profesional'),
+    ('Belgrano', 'Liga Profesional'), ('Lanús', 'Liga Profesional'),
+    ('Banfield', 'Liga Profesional'), ('Argentinos Juniors', 'Liga Profesional'),
+    ('Argentina', 'Selecciones'), ('Brasil', 'Selecciones'), ('Uruguay', 'Selecciones'),
+    ('Barcelona', 'La Liga'), ('Real Madrid', 'La Liga'), ('Manchester City', 'Premier League'),
+    ('Liverpool', 'Premier League'), ('Juventus', 'Serie A'), ('Inter', 'Serie A'),
+    ('Bayern Múnich', 'Bundesliga'), ('PSG', 'Ligue 1'), ('Milan', 'Serie A'),
+]
+
+# categoría -> (modelos, curva de talles, precio base)
+CATEGORIAS = {
+    'Camisetas': (['Titular', 'Alternativa', 'Tercera', 'Arquero'],
+                  ['S', 'M', 'L', 'XL', 'XXL', '6', '8', '10', '12', '14', '16'], 45000),
+    'Shorts': (['Titular', 'Alternativa'], ['S', 'M', 'L', 'XL', 'XXL', '8', '10', '12', '14'], 25000),
+    'Buzos': (['Entrenamiento', 'Salida'], ['S', 'M', 'L', 'XL', 'XXL'], 60000),
+    'Conjuntos': (['Niño Titular', 'Niño Alternativo'], ['6', '8', '10', '12', '14', '16'], 55000),
+    'Medias': (['Titular', 'Alternativa'], ['1', '2', '3', '4', '5'], 12000),
+    'Accesorios': (['Gorra', 'Bufanda', 'Mochila'], ['U'], 18000),
+}
+
+NOMBRES = ['Juan', 'María', 'Lucas', 'Sofía', 'Mateo', 'Valentina', 'Santiago', 'Camila', 'Benjamín',
+           'Martina', 'Tomás', 'Lucía', 'Joaquín', 'Julieta', 'Thiago', 'Catalina', 'Facundo', 'Agustina']
+APELLIDOS = ['González', 'Rodríguez', 'Gómez', 'Fernández', 'López', 'Díaz', 'Martínez', 'Pérez',
+             'García', 'Sánchez', 'Romero', 'Sosa', 'Álvarez', 'Torres', 'Ruiz', 'Ramírez', 'Flores']
+
+
+def _siguiente_id(modelo):
+    return (db.session.execute(select(func.max(modelo.id))).scalar() or 0) + 1
+
+
+def _insertar(modelo, filas):
+    """INSERT en bloques por la conexión: sin eventos del ORM ni de services.cambios"""
+    conexion = db.session.connection()
+    for desde in range(0, len(filas), FILAS_POR_INSERT):
+        conexion.execute(insert(modelo.__table__), filas[desde:desde + FILAS_POR_INSERT])
+
+
+def _referencias(rnd, clubes):
+    existentes = dict(db.session.execute(select(Club.nombre, Club.id)).all())
+    nuevos, siguiente = [], _siguiente_id(Club)
+    lista = CLUBES + [(f'Club {i}', 'Ascenso') for i in range(len(CLUBES) + 1, clubes + 1)]
+    for nombre, liga in lista[:clubes]:
+        if nombre not in existentes:
+            existentes[nombre] = siguiente
+            nuevos.append({'id': siguiente, 'nombre': nombre, 'liga': liga})
+            siguiente += 1
+    _insertar(Club, nuevos)
+    clubes = [existentes[nombre] for nombre, _ in lista[:clubes]]
+
+    categorias = dict(db.session.execute(select(Categoria.nombre, Categoria.id)).all())
+    nuevas, siguiente = [], _siguiente_id(Categoria)
+    for nombre in CATEGORIAS:
+        if nombre not in categorias:
+            categorias[nombre] = siguiente
+            nuevas.append({'id': siguiente, 'nombre': nombre})
+            siguiente += 1
+    _insertar(Categoria, nuevas)
+
+    caja = db.session.execute(select(Caja.id).order_by(Caja.id)).scalar()
+    if caja is None:
+        caja = _siguiente_id(Caja)
+        _insertar(Caja, [{'id': caja, 'nombre': 'Caja Principal', 'saldo': 0.0}])
+    return clubes, categorias, caja
+
+
+def _catalogo(rnd, clubes, categorias, temporadas, productos_por_temporada):
+    """Productos por club y temporada con la curva de talles completa de su categoría"""
+    productos, variantes = [], []
+    producto_id, variante_id = _siguiente_id(Producto), _siguiente_id(Variante)
+    nombres_club = dict(db.session.execute(select(Club.id, Club.nombre)).all())
+    por_temporada = {}
+    combinaciones = [(c, m) for c, (modelos, _, _) in CATEGORIAS.items() for m in modelos]
+
+    for temporada in temporadas:
+        for club_id in clubes:
+            for categoria, modelo in rnd.sample(combinaciones, min(productos_por_temporada, len(combinaciones))):
+                _, talles, base = CATEGORIAS[categoria]
+                precio = round(base * (1.25 ** (temporada - temporadas[0])) * rnd.uniform(0.9, 1.1), -2)
+                productos.append({
+                    'id': producto_id, 'nombre': f'{categoria[:-1]} {modelo} {nombres_club[club_id]} {temporada}'[:100],
+                    'club_id': club_id, 'categoria_id': categorias[categoria],
+                    'temporada': str(temporada), 'precio': precio, 'activo': True,
+                    'fecha_creacion': datetime(temporada, 1, 1)
+                })
+                for talle in talles:
+                    variantes.append({
+                        'id': variante_id, 'producto_id': producto_id, 'talle': talle,
+                        'sku': f'{club_id:03d}-{producto_id}-{talle}', 'precio': precio,
+                        'stock': 0, 'stock_minimo': rnd.choice((0, 2, 3, 5)), 'version': 0
+                    })
+                    por_temporada.setdefault(temporada, []).append((variante_id, precio))
+                    variante_id += 1
+                producto_id += 1
+
+    _insertar(Producto, productos)
+    _insertar(Variante, variantes)
+    return variantes, por_temporada
+
+
+def _clientes(rnd, cantidad):
+    primero = _siguiente_id(Cliente)
+    filas = []
+    for i in range(primero, primero + cantidad):
+        fila = {'id': i, 'nombre': f'{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)}',
+                'email': f'cliente{i}@mail.com', 'telefono': f'11{rnd.randrange(10**7, 10**8)}'}
+        fila.update(claves_busqueda(fila['nombre'], fila['email'], fila['telefono']))
+        filas.append(fila)
+    _insertar(Cliente, filas)
+    return list(range(primero, primero + cantidad))
+
+
+def generar(clubes=28, anios=3, productos_por_temporada=6, clientes=5000, ventas=100000,
+            semilla=1, hasta=None, usuario='seed', progreso=None):
+    """Genera datos sintéticos reproducibles: misma semilla y fecha final, mismos datos.
+
+    Las ventas se reparten en los últimos `anios` años con sus ítems, la salida
+    de stock y el ingreso de caja de cada una. Al final se agrega la entrada de
+    stock inicial de cada variante, de modo que Variante.stock coincide con el
+    libro de movimientos. progreso(mensaje) informa el avance.
+    """
+    rnd = random.Random(semilla)
+    avisar = progreso or (lambda mensaje: None)
+    hasta = (hasta or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+    desde = hasta - timedelta(days=365 * anios)
+    temporadas = list(range(desde.year, hasta.year + 1))
+
+    clubes, categorias, caja_id = _referencias(rnd, clubes)
+    variantes, por_temporada = _catalogo(rnd, clubes, categorias, temporadas, productos_por_temporada)
+    avisar(f'{len(variantes)} variantes en {len(temporadas)} temporadas')
+    ids_clientes = _clientes(rnd, clientes)
+    db.session.commit()
+    avisar(f'{clientes} clientes')
+
+    vendidas = {}
+    venta_id, item_id = _siguiente_id(Venta), _siguiente_id(VentaItem)
+    caja_mov_id, stock_mov_id = _siguiente_id(MovimientoCaja), _siguiente_id(MovimientoStock)
+    dias = (hasta - desde).days
+    segundos = sorted(rnd.randrange(dias * 86400) for _ in range(ventas))
+
+    for inicio in range(0, ventas, VENTAS_POR_TRANSACCION):
+        filas_ventas, filas_items, filas_stock, filas_caja = [], [], [], []
+        for segundo in segundos[inicio:inicio + VENTAS_POR_TRANSACCION]:
+            fecha = desde + timedelta(seconds=segundo)
+            # Se vende sobre todo la temporada actual y la anterior
+            catalogo = por_temporada[fecha.year] + por_temporada.get(fecha.year - 1, [])
+            total = 0.0
+            for variante_id, precio in rnd.sample(catalogo, rnd.choice((1, 1, 1, 2, 2, 3, 4))):
+                cantidad = rnd.choice((1, 1, 1, 1, 2))
+                subtotal = precio * cantidad
+                total += subtotal
+                vendidas[variante_id] = vendidas.get(variante_id, 0) + cantidad
+                filas_items.append({'id': item_id, 'venta_id': venta_id, 'variante_id': variante_id,
+                                    'cantidad': cantidad, 'precio_unitario': precio, 'subtotal': subtotal})
+                filas_stock.append({'id': stock_mov_id, 'variante_id': variante_id, 'fecha': fecha,
+                                    'tipo': 'salida', 'cantidad': cantidad,
+                                    'motivo': f'Venta #{venta_id}', 'usuario': usuario})
+                item_id += 1
+                stock_mov_id += 1
+            filas_caja.append({'id': caja_mov_id, 'caja_id': caja_id, 'fecha': fecha, 'tipo': 'ingreso',
+                               'motivo': f'Venta #{venta_id}', 'monto': total})
+            filas_ventas.append({
+                'id': venta_id, 'fecha_venta': fecha, 'total': total,
+                'cliente_id': rnd.choice(ids_clientes) if ids_clientes and rnd.random() < 0.6 else None,
+                'tipo_venta': 'online' if rnd.random() < 0.3 else 'fisica',
+                'estado': 'completada', 'movimiento_caja_id': caja_mov_id
+            })
+            venta_id += 1
+            caja_mov_id += 1
+
+        _insertar(MovimientoCaja, filas_caja)
+        _insertar(Venta, filas_ventas)
+        _insertar(VentaItem, filas_items)
+        _insertar(MovimientoStock, filas_stock)
+        db.session.commit()
+        avisar(f'{min(inicio + VENTAS_POR_TRANSACCION, ventas)} ventas')
+
+    # Stock inicial: lo vendido más un remanente, registrado al comienzo del período
+    entradas, stocks = [], []
+    for variante in variantes:
+        remanente = rnd.choice((0, 1, 2, 3, 5, 8, 12, 20))
+        stocks.append({'v_id': variante['id'], 'v_stock': remanente})
+        cantidad = vendidas.get(variante['id'], 0) + remanente
+        if cantidad:
+            entradas.append({'id': stock_mov_id, 'variante_id': variante['id'], 'fecha': desde,
+                             'tipo': 'entrada', 'cantidad': cantidad,
+                             'motivo': 'Stock inicial (datos generados)', 'usuario': usuario})
+            stock_mov_id += 1
+    tabla = Variante.__table__
+    db.session.connection().execute(
+        update(tabla).where(tabla.c.id == bindparam('v_id')).values(stock=bindparam('v_stock')), stocks
+    )
+    _insertar(MovimientoStock, entradas)
+    db.session.commit()
+    avisar('stock inicial registrado')
+
+    return {'clubes': len(clubes), 'productos': len({v['producto_id'] for v in variantes}),
+            'variantes': len(variantes), 'clientes': clientes, 'ventas': ventas}
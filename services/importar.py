@@ -0,0 +1,192 @@
+import csv
+from itertools import chain, islice
+from sqlalchemy import insert, select, tuple_
+from models import db, Club, Categoria, Producto, Variante, MovimientoStock
+from services.busqueda import normalizar
+
+# Filas por transacción: cada lote se valida, inserta y confirma por separado
+LOTE_IMPORTACION = 500
+
+MOTIVO_IMPORTACION = 'Carga inicial de stock (importación)'
+
+# Mismos nombres de columna que la exportación del catálogo
+COLUMNAS_REQUERIDAS = ('producto', 'club', 'categoria', 'temporada', 'talle', 'sku', 'precio')
+
+_LARGOS = {'producto': 100, 'temporada': 10, 'talle': 10, 'sku': 50, 'color': 30}
+
+
+class ErrorImportacion(Exception):
+    """El archivo no se puede importar (encabezado inválido)"""
+
+
+def _columna(encabezado):
+    return normalizar(encabezado).strip().replace(' ', '_')
+
+
+def _lector(lineas):
+    """Genera (linea, {columna: valor}) con encabezados normalizados; acepta ',' o ';'"""
+    lineas = iter(lineas)
+    primera = next(lineas, '')
+    separador = ';' if primera.count(';') > primera.count(',') else ','
+    lector = csv.reader(chain([primera], lineas), delimiter=separador)
+    encabezados = [_columna(e) for e in next(lector, [])]
+    faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in encabezados]
+    if faltantes:
+        raise ErrorImportacion(f"Faltan columnas: {', '.join(faltantes)}")
+    # La línea 1 es el encabezado
+    for linea, valores in enumerate(lector, start=2):
+        if any(v.strip() for v in valores):
+            yield linea, dict(zip(encabezados, (v.strip() for v in valores)))
+
+
+def _numero(texto, tipo, campo):
+    try:
+        valor = tipo(texto.replace(',', '.')) if texto else 0
+    except ValueError:
+        raise ValueError(f'{campo} inválido: {texto}')
+    if valor < 0:
+        raise ValueError(f'{campo} no puede ser negativo')
+    return valor
+
+
+def _validar(fila):
+    """Convierte una fila del CSV; lanza ValueError con el motivo si es inválida"""
+    for campo in COLUMNAS_REQUERIDAS:
+        if not fila.get(campo):
+            raise ValueError(f'Falta {campo}')
+    for campo, largo in _LARGOS.items():
+        if len(fila.get(campo) or '') > largo:
+            raise ValueError(f'{campo} supera {largo} caracteres')
+    return {
+        'producto': fila['producto'],
+        'club': fila['club'],
+        'categoria': fila['categoria'],
+        'temporada': fila['temporada'],
+        'talle': fila['talle'],
+        'sku': fila['sku'],
+        'color': fila.get('color') or None,
+        'descripcion': fila.get('descripcion') or None,
+        'precio': _numero(fila['precio'], float, 'precio'),
+        'stock': _numero(fila.get('stock'), int, 'stock'),
+        'stock_minimo': _numero(fila.get('stock_minimo'), int, 'stock_minimo'),
+    }
+
+
+def _resolver_nombres(modelo, nombres, cache):
+    """Completa cache {nombre: id} con una consulta por los nombres que falten"""
+    faltantes = {n for n in nombres if n not in cache}
+    if faltantes:
+        cache.update(db.session.execute(
+            select(modelo.nombre, modelo.id).where(modelo.nombre.in_(faltantes))
+        ).all())
+
+
+def _ids_productos(claves):
+    columnas = (Producto.nombre, Producto.club_id, Producto.categoria_id, Producto.temporada)
+    filas = db.session.execute(
+        select(*columnas, Producto.id).where(tuple_(*columnas).in_(claves))
+    ).all()
+    return {tuple(fila[:4]): fila.id for fila in filas}
+
+
+def _importar_lote(filas, usuario, clubes, categorias, skus_vistos, productos, resultado):
+    """Valida e inserta un lote de (linea, fila) con inserciones masivas"""
+    validas = []
+    for linea, fila in filas:
+        try:
+            validas.append((linea, _validar(fila)))
+        except ValueError as e:
+            resultado['errores'].append((linea, str(e)))
+
+    _resolver_nombres(Club, {f['club'] for _, f in validas}, clubes)
+    _resolver_nombres(Categoria, {f['categoria'] for _, f in validas}, categorias)
+
+    # Unicidad de SKU contra la base en una sola consulta por lote
+    existentes = set(db.session.execute(
+        select(Variante.sku).where(Variante.sku.in_({f['sku'] for _, f in validas}))
+    ).scalars())
+
+    aceptadas = []
+    for linea, fila in validas:
+        if fila['club'] not in clubes:
+            resultado['errores'].append((linea, f"Club inexistente: {fila['club']}"))
+        elif fila['categoria'] not in categorias:
+            resultado['errores'].append((linea, f"Categoría inexistente: {fila['categoria']}"))
+        elif fila['sku'] in existentes:
+            resultado['errores'].append((linea, f"El SKU {fila['sku']} ya existe"))
+        elif fila['sku'] in skus_vistos:
+            resultado['errores'].append((linea, f"SKU repetido en el archivo: {fila['sku']}"))
+        else:
+            skus_vistos.add(fila['sku'])
+            fila['clave'] = (fila['producto'], clubes[fila['club']], categorias[fila['categoria']], fila['temporada'])
+            aceptadas.append(fila)
+    if not aceptadas:
+        return
+
+    # Productos: los que ya existen se reutilizan, el resto se inserta en bloque
+    claves = list({f['clave'] for f in aceptadas if f['clave'] not in productos})
+    if claves:
+        productos.update(_ids_productos(claves))
+        nuevos = {}
+        for fila in aceptadas:
+            if fila['clave'] not in productos and fila['clave'] not in nuevos:
+                nombre, club_id, categoria_id, temporada = fila['clave']
+                nuevos[fila['clave']] = {
+                    'nombre': nombre, 'club_id': club_id, 'categoria_id': categoria_id,
+                    'temporada': temporada, 'descripcion': fila['descripcion'], 'precio': fila['precio']
+                }
+        if nuevos:
+            db.session.execute(insert(Producto), list(nuevos.values()))
+            productos.update(_ids_productos(list(nuevos)))
+            resultado['productos'] += len(nuevos)
+
+    # Las variantes entran con su stock y el mismo lote agrega las entradas
+    # del libro, así Variante.stock coincide con la suma de sus movimientos
+    db.session.execute(insert(Variante), [{
+        'producto_id': productos[f['clave']],
+        'talle': f['talle'],
+        'color': f['color'],
+        'sku': f['sku'],
+        'precio': f['precio'],
+        'stock': f['stock'],
+        'stock_minimo': f['stock_minimo']
+    } for f in aceptadas])
+    ids = dict(db.session.execute(
+        select(Variante.sku, Variante.id).where(Variante.sku.in_([f['sku'] for f in aceptadas]))
+    ).all())
+    movimientos = [{
+        'variante_id': ids[f['sku']],
+        'tipo': 'entrada',
+        'cantidad': f['stock'],
+        'motivo': MOTIVO_IMPORTACION,
+        'usuario': usuario
+    } for f in aceptadas if f['stock']]
+    if movimientos:
+        db.session.execute(insert(MovimientoStock), movimientos)
+    resultado['variantes'] += len(aceptadas)
+
+
+def importar_catalogo(lineas, usuario, lote=LOTE_IMPORTACION, progreso=None):
+    """Importa productos, variantes y stock inicial desde las líneas de un CSV.
+
+    Se procesa en lotes de `lote` filas, cada uno en su propia transacción;
+    las filas con errores se informan y no detienen la importación.
+    progreso(resultado) se llama después de confirmar cada lote.
+    Devuelve {'filas', 'productos', 'variantes', 'errores': [(linea, motivo)]}.
+    """
+    resultado = {'filas': 0, 'productos': 0, 'variantes': 0, 'errores': []}
+    clubes, categorias, productos, skus_vistos = {}, {}, {}, set()
+
+    filas = _lector(lineas)
+    while True:
+        tanda = list(islice(filas, lote))
+        if not tanda:
+            break
+        _importar_lote(tanda, usuario, clubes, categorias, skus_vistos, productos, resultado)
+        db.session.commit()
+        resultado['filas'] += len(tanda)
+        if progreso:
+            progreso(resultado)
+
+    resultado['errores'].sort()
+    return resultado
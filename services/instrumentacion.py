@@ -0,0 +1,133 @@
+import re
+import threading
+import time
+from collections import Counter
+from flask import abort, current_app, g, has_request_context, jsonify, request
+from flask_login import current_user, login_required
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Una misma sentencia repetida esta cantidad de veces en un pedido se informa como N+1
+UMBRAL_N_MAS_1 = 5
+
+_lock = threading.Lock()
+_por_endpoint = {}  # endpoint -> {'pedidos', 'consultas', 'tiempo', 'n_mas_1', 'sentencias': Counter}
+
+_LISTAS = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)|\((?:\s*%s\s*,)+\s*%s\s*\)')
+_NUMEROS = re.compile(r'\b\d+\b')
+_ESPACIOS = re.compile(r'\s+')
+
+
+def huella(sentencia):
+    """Normaliza una sentencia para agrupar las que solo difieren en sus parámetros"""
+    sentencia = _LISTAS.sub('(?)', sentencia)
+    sentencia = _NUMEROS.sub('?', sentencia)
+    return _ESPACIOS.sub(' ', sentencia).strip()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes(conexion, cursor, sentencia, parametros, contexto, executemany):
+    if has_request_context() and 'sql' in g:
+        conexion.info.setdefault('inicio_sql', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _despues(conexion, cursor, sentencia, parametros, contexto, executemany):
+    inicios = conexion.info.get('inicio_sql')
+    if not inicios or not has_request_context() or 'sql' not in g:
+        return
+    duracion = time.perf_counter() - inicios.pop()
+    g.sql['consultas'] += 1
+    g.sql['tiempo'] += duracion
+    g.sql['sentencias'][huella(sentencia)] += 1
+
+
+@event.listens_for(Engine, 'handle_error')
+def _error(contexto):
+    conexion = contexto.connection
+    if conexion is not None and conexion.info.get('inicio_sql'):
+        conexion.info['inicio_sql'].pop()
+
+
+def _iniciar():
+    g.sql = {'consultas': 0, 'tiempo': 0.0, 'sentencias': Counter()}
+
+
+def _registrar(respuesta):
+    """Acumula las consultas del pedido y avisa de patrones N+1.
+
+    Las consultas que se ejecutan mientras se envía una respuesta en streaming
+    no llegan a contarse.
+    """
+    datos = g.pop('sql', None)
+    if datos is None:
+        return respuesta
+
+    endpoint = request.endpoint or 'desconocido'
+    umbral = current_app.config.get('SQL_N_MAS_1_UMBRAL', UMBRAL_N_MAS_1)
+    repetidas = [(s, n) for s, n in datos['sentencias'].most_common() if n >= umbral]
+    for sentencia, veces in repetidas:
+        current_app.logger.warning('Posible N+1 en %s: %d ejecuciones de %s', endpoint, veces, sentencia[:300])
+
+    with _lock:
+        acumulado = _por_endpoint.setdefault(endpoint, {
+            'pedidos': 0, 'consultas': 0, 'tiempo': 0.0, 'n_mas_1': 0, 'sentencias': Counter()
+        })
+        acumulado['pedidos'] += 1
+        acumulado['consultas'] += datos['consultas']
+        acumulado['tiempo'] += datos['tiempo']
+        acumulado['n_mas_1'] += bool(repetidas)
+        acumulado['sentencias'].update(dict(repetidas))
+
+    if current_app.debug or current_app.config.get('SQL_CABECERAS'):
+        respuesta.headers['X-SQL-Consultas'] = str(datos['consultas'])
+        respuesta.headers['X-SQL-Tiempo-ms'] = f"{datos['tiempo'] * 1000:.1f}"
+        respuesta.headers['X-SQL-N-Mas-1'] = str(len(repetidas))
+    return respuesta
+
+
+def resumen():
+    """Totales por endpoint y por blueprint desde que arrancó el proceso"""
+    with _lock:
+        endpoints = {nombre: dict(datos, sentencias=datos['sentencias'].most_common(5))
+                     for nombre, datos in _por_endpoint.items()}
+
+    blueprints = {}
+    for nombre, datos in endpoints.items():
+        blueprint = blueprints.setdefault(nombre.split('.')[0] if '.' in nombre else '-', {
+            'pedidos': 0, 'consultas': 0, 'tiempo': 0.0, 'n_mas_1': 0
+        })
+        for clave in blueprint:
+            blueprint[clave] += datos[clave]
+
+    for datos in list(endpoints.values()) + list(blueprints.values()):
+        datos['consultas_por_pedido'] = round(datos['consultas'] / datos['pedidos'], 1)
+        datos['tiempo_ms_por_pedido'] = round(datos['tiempo'] * 1000 / datos['pedidos'], 2)
+        datos['tiempo'] = round(datos['tiempo'], 4)
+    return {'blueprints': blueprints, 'endpoints': endpoints}
+
+
+def reiniciar():
+    with _lock:
+        _por_endpoint.clear()
+
+
+@login_required
+def _ver_resumen():
+    # Expone el SQL de toda la aplicación: solo para administradores
+    if current_user.rol != 'admin':
+        abort(403)
+    return jsonify(resumen())
+
+
+def init_app(app):
+    """Mide las consultas de cada pedido si SQL_INSTRUMENTACION está activo.
+
+    /debug/sql solo se registra en modo debug.
+    """
+    if not app.config.get('SQL_INSTRUMENTACION', False):
+        return
+    app.before_request(_iniciar)
+    app.after_request(_registrar)
+    if app.debug:
+        app.add_url_rule('/debug/sql', 'resumen_sql', _ver_resumen)
@@ -0,0 +1,137 @@
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, select, tuple_
+from models import db
+
+POR_PAGINA = 50
+
+# Conteos aproximados: {(listado, filtros): (expira, total)}
+CONTEO_TTL = 60
+CONTEO_MAX_ENTRADAS = 256
+_conteos = {}
+
+
+class Pagina:
+    """Resultado de una consulta paginada por clave (fecha, id)"""
+    def __init__(self, items, siguiente, total, primera):
+        self.items = items
+        self.siguiente = siguiente
+        self.total = total
+        self.primera = primera
+
+
+def parsear_fecha(texto):
+    """'YYYY-MM-DD' del formulario a datetime; None si viene vacío o mal formado"""
+    if not texto:
+        return None
+    try:
+        return datetime.strptime(texto, '%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+def filtrar_fechas(consulta, columna, fecha_desde, fecha_hasta):
+    """Aplica un rango semiabierto [desde, hasta + 1 día) con valores DateTime.
+
+    Comparar contra datetimes (y no contra el texto del formulario) permite usar
+    el índice de la columna e incluye todo el día 'hasta'.
+    """
+    desde = parsear_fecha(fecha_desde)
+    hasta = parsear_fecha(fecha_hasta)
+    if desde:
+        consulta = consulta.where(columna >= desde)
+    if hasta:
+        consulta = consulta.where(columna < hasta + timedelta(days=1))
+    return consulta
+
+
+def _codificar_cursor(fecha, id_):
+    return f'{fecha.isoformat()}_{id_}'
+
+
+def _decodificar_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        fecha, id_ = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(fecha), int(id_)
+    except ValueError:
+        return None
+
+
+def total_aproximado(clave, consulta):
+    """COUNT(*) de la consulta filtrada, cacheado por proceso durante unos segundos"""
+    ttl = current_app.config.get('LISTADOS_CONTEO_TTL', CONTEO_TTL)
+    ahora = time.monotonic()
+    cacheado = _conteos.get(clave)
+    if cacheado and cacheado[0] > ahora:
+        return cacheado[1]
+
+    # De la primaria: el conteo queda cacheado y una réplica atrasada lo dejaría viejo
+    total = db.session.execute(
+        select(func.count()).select_from(consulta.order_by(None).subquery()),
+        execution_options={'solo_primaria': True}
+    ).scalar()
+
+    if len(_conteos) >= CONTEO_MAX_ENTRADAS:
+        _conteos.clear()
+    _conteos[clave] = (ahora + ttl, total)
+    return total
+
+
+def paginar(nombre, consulta, col_fecha, col_id, cursor=None, filtros=None, por_pagina=POR_PAGINA):
+    """Pagina una consulta select() de la más nueva a la más vieja por (fecha, id).
+
+    La consulta debe proyectar col_fecha y col_id con sus nombres de atributo.
+    La página siguiente se pide con el cursor devuelto, sin OFFSET: cada página
+    cuesta lo mismo sin importar cuán atrás esté en el historial.
+    """
+    total = total_aproximado((nombre, tuple(sorted((filtros or {}).items()))), consulta)
+
+    posicion = _decodificar_cursor(cursor)
+    if posicion:
+        consulta = consulta.where(tuple_(col_fecha, col_id) < tuple_(*posicion))
+
+    filas = db.session.execute(
+        consulta.order_by(col_fecha.desc(), col_id.desc()).limit(por_pagina + 1)
+    ).all()
+
+    siguiente = None
+    if len(filas) > por_pagina:
+        filas = filas[:por_pagina]
+        ultima = filas[-1]
+        siguiente = _codificar_cursor(getattr(ultima, col_fecha.key), getattr(ultima, col_id.key))
+
+    return Pagina(filas, siguiente, total, primera=posicion is None)
+
+
+class PaginaNumerada:
+    """Resultado de una consulta paginada por número de página"""
+    def __init__(self, items, numero, total, por_pagina):
+        self.items = items
+        self.numero = numero
+        self.total = total
+        self.paginas = max(1, -(-total // por_pagina))
+
+    @property
+    def anterior(self):
+        return self.numero - 1 if self.numero > 1 else None
+
+    @property
+    def siguiente(self):
+        return self.numero + 1 if self.numero < self.paginas else None
+
+
+def paginar_por_numero(nombre, consulta, orden, numero=1, filtros=None, por_pagina=POR_PAGINA):
+    """Pagina una consulta select() con LIMIT/OFFSET sobre el orden pedido.
+
+    Para grillas que se ordenan por cualquier columna, donde no hay una clave
+    única por la que avanzar; orden debe terminar en una columna única.
+    """
+    total = total_aproximado((nombre, tuple(sorted((filtros or {}).items()))), consulta)
+    numero = max(1, numero)
+    filas = db.session.execute(
+        consulta.order_by(*orden).limit(por_pagina).offset((numero - 1) * por_pagina)
+    ).all()
+    return PaginaNumerada(filas, numero, total, por_pagina)
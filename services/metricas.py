@@ -0,0 +1,160 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, select, true
+from models import db, Producto, Venta, Cliente, Variante, ResumenVentaDiario
+from services.cambios import al_confirmar
+
+# Respaldo para despliegues con varios procesos: cada proceso invalida su
+# propia caché al escribir, pero no se entera de las escrituras de los demás
+METRICAS_TTL = 60
+
+# Contadores que se mantienen sumando las altas y bajas de cada commit
+_CONTADORES = {
+    'productos': 'total_productos',
+    'ventas': 'total_ventas',
+    'clientes': 'total_clientes',
+}
+
+# Las consultas que llenan la caché van siempre a la primaria: una réplica
+# atrasada guardaría para todos los usuarios un valor anterior al último commit
+_PRIMARIA = {'solo_primaria': True}
+
+# Métricas que se recalculan (en una sola consulta) cuando cambian estas tablas.
+# La recaudación no está: se ajusta con las sumas que anota services.resumen
+_DEPENDENCIAS = {
+    'variantes': ('productos_bajo_stock',),
+    'ventas': ('ventas_recientes',),
+    'clientes': ('ventas_recientes',),
+}
+
+_ESCALARES = (
+    'total_productos', 'total_ventas', 'total_clientes',
+    'productos_bajo_stock', 'recaudacion_hoy', 'recaudacion_mes'
+)
+
+_lock = threading.Lock()
+_cache = {}
+_expira = 0.0
+_generacion = 0
+
+
+def _escalares(nombres, hoy):
+    consultas = {
+        'total_productos': select(func.count(Producto.id)),
+        'total_ventas': select(func.count(Venta.id)),
+        'total_clientes': select(func.count(Cliente.id)),
+        'productos_bajo_stock': select(func.count(Variante.id)).where(Variante.stock <= Variante.stock_minimo),
+        'recaudacion_hoy': select(func.coalesce(func.sum(ResumenVentaDiario.recaudacion), 0))
+            .where(ResumenVentaDiario.fecha == hoy),
+        'recaudacion_mes': select(func.coalesce(func.sum(ResumenVentaDiario.recaudacion), 0))
+            .where(ResumenVentaDiario.fecha >= hoy - timedelta(days=29)),
+    }
+    return [consultas[nombre].scalar_subquery().label(nombre) for nombre in nombres]
+
+
+def _ventas_recientes():
+    return select(
+        Venta.id,
+        Venta.fecha_venta,
+        Venta.total,
+        Cliente.nombre.label('cliente_nombre')
+    ).outerjoin(Cliente, Venta.cliente_id == Cliente.id)\
+        .order_by(Venta.fecha_venta.desc(), Venta.id.desc())\
+        .limit(5)
+
+
+def _consultar(nombres, hoy, recientes):
+    """Calcula las métricas pedidas, y las ventas recientes si hacen falta, con un único SELECT.
+
+    Las ventas recientes se unen (LEFT JOIN) a la fila de subconsultas
+    escalares, así que llegan aunque no haya ninguna venta.
+    """
+    if not recientes:
+        fila = db.session.execute(select(*_escalares(nombres, hoy)), execution_options=_PRIMARIA).one()
+        return fila._asdict()
+    if not nombres:
+        return {'ventas_recientes': db.session.execute(_ventas_recientes(), execution_options=_PRIMARIA).all()}
+
+    escalares = select(*_escalares(nombres, hoy)).subquery('escalares')
+    ventas = _ventas_recientes().subquery('recientes')
+    filas = db.session.execute(
+        select(escalares, ventas)
+        .select_from(escalares.outerjoin(ventas, true()))
+        .order_by(ventas.c.fecha_venta.desc(), ventas.c.id.desc()),
+        execution_options=_PRIMARIA
+    ).all()
+    datos = {nombre: getattr(filas[0], nombre) for nombre in nombres}
+    datos['ventas_recientes'] = [fila for fila in filas if fila.id is not None]
+    return datos
+
+
+def metricas_dashboard():
+    """Métricas del dashboard; sin consultas mientras la caché siga vigente"""
+    global _expira
+    hoy = datetime.utcnow().date()
+
+    with _lock:
+        if time.monotonic() >= _expira or _cache.get('dia') != hoy:
+            _cache.clear()
+        datos = dict(_cache)
+        generacion = _generacion
+
+    escalares = [nombre for nombre in _ESCALARES if nombre not in datos]
+    recientes = 'ventas_recientes' not in datos
+    if escalares or recientes:
+        datos.update(_consultar(escalares, hoy, recientes))
+
+    with _lock:
+        # Si hubo un commit mientras se consultaba, no se guarda un valor posiblemente viejo
+        if generacion == _generacion:
+            if not _cache:
+                _expira = time.monotonic() + current_app.config.get('METRICAS_TTL', METRICAS_TTL)
+            _cache.update(datos, dia=hoy)
+
+    return datos
+
+
+@al_confirmar
+def _actualizar(cambios):
+    """Ajusta contadores e invalida las métricas afectadas por un commit"""
+    global _generacion
+    with _lock:
+        _generacion += 1
+        for tabla, cambio in cambios.items():
+            clave = _CONTADORES.get(tabla)
+            if clave in _cache:
+                if cambio['exacto']:
+                    _cache[clave] += cambio['insertados'] - cambio['eliminados']
+                else:
+                    del _cache[clave]
+            for dependiente in _DEPENDENCIAS.get(tabla, ()):
+                _cache.pop(dependiente, None)
+        resumen = cambios.get('ventas_resumen_diario')
+        if resumen is not None:
+            _sumar_recaudacion(resumen)
+
+
+def _sumar_recaudacion(cambio):
+    """Suma a la recaudación cacheada la de cada día anotada por services.resumen (con _lock tomado)"""
+    dia = _cache.get('dia')
+    if dia is None or cambio['insertados'] or cambio['eliminados'] or cambio['modificados']:
+        # El resumen se escribió por la sesión, sin sumas: se vuelve a consultar
+        _cache.pop('recaudacion_hoy', None)
+        _cache.pop('recaudacion_mes', None)
+        return
+    for (nombre, fecha), monto in cambio['sumas'].items():
+        if nombre != 'recaudacion':
+            continue
+        if fecha == dia and 'recaudacion_hoy' in _cache:
+            _cache['recaudacion_hoy'] += monto
+        if dia - timedelta(days=29) <= fecha <= dia and 'recaudacion_mes' in _cache:
+            _cache['recaudacion_mes'] += monto
+
+
+def invalidar():
+    global _generacion
+    with _lock:
+        _generacion += 1
+        _cache.clear()
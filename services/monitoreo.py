@@ -0,0 +1,166 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Límites (en segundos) de los buckets del histograma de latencia
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PREFIJO = 'campeones'
+
+# Posiciones en la lista de cada endpoint
+_PEDIDOS, _ERRORES, _SEGUNDOS, _SEGUNDOS_DB, _BUCKETS = range(5)
+
+# Cada hilo escribe solo en su propio diccionario, sin locks en el camino del
+# pedido; /metrics suma todos. Los de hilos terminados se consolidan en
+# _retirados cada vez que se registra un hilo nuevo o se leen los totales, así
+# _hilos no crece con servidores que crean un hilo por pedido.
+_local = threading.local()
+_hilos = []  # [(hilo, datos)]
+_lock_registro = threading.Lock()
+_retirados = {}
+
+
+def _consolidar_terminados():
+    """Pasa a _retirados los datos de los hilos que ya terminaron (con _lock_registro tomado)"""
+    vivos = []
+    for hilo, datos in _hilos:
+        if hilo.is_alive():
+            vivos.append((hilo, datos))
+        else:
+            _sumar(_retirados, datos)
+    _hilos[:] = vivos
+
+
+def _datos_del_hilo():
+    datos = getattr(_local, 'datos', None)
+    if datos is None:
+        datos = _local.datos = {}
+        with _lock_registro:
+            _consolidar_terminados()
+            _hilos.append((threading.current_thread(), datos))
+    return datos
+
+
+def _nuevo():
+    return [0, 0, 0.0, 0.0, [0] * (len(BUCKETS) + 1)]
+
+
+# Tiempo de base de datos del pedido: un cronómetro propio, independiente de
+# services.instrumentacion (apagada en producción), que solo suma a g.tiempo_db
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_sql(conexion, cursor, sentencia, parametros, contexto, executemany):
+    if has_request_context() and 'tiempo_db' in g:
+        conexion.info.setdefault('inicio_db', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _despues_sql(conexion, cursor, sentencia, parametros, contexto, executemany):
+    inicios = conexion.info.get('inicio_db')
+    if inicios and has_request_context() and 'tiempo_db' in g:
+        g.tiempo_db += time.perf_counter() - inicios.pop()
+
+
+@event.listens_for(Engine, 'handle_error')
+def _error_sql(contexto):
+    conexion = contexto.connection
+    if conexion is not None and conexion.info.get('inicio_db'):
+        conexion.info['inicio_db'].pop()
+
+
+def _iniciar():
+    g.inicio_pedido = time.perf_counter()
+    g.tiempo_db = 0.0
+
+
+def _registrar(respuesta):
+    inicio = g.pop('inicio_pedido', None)
+    if inicio is None:
+        return respuesta
+    duracion = time.perf_counter() - inicio
+
+    datos = _datos_del_hilo()
+    endpoint = request.endpoint or 'desconocido'
+    valores = datos.get(endpoint)
+    if valores is None:
+        valores = datos[endpoint] = _nuevo()
+    valores[_PEDIDOS] += 1
+    if respuesta.status_code >= 500:
+        valores[_ERRORES] += 1
+    valores[_SEGUNDOS] += duracion
+    valores[_SEGUNDOS_DB] += g.pop('tiempo_db', 0.0)
+    valores[_BUCKETS][bisect_left(BUCKETS, duracion)] += 1
+    return respuesta
+
+
+def _sumar(destino, origen):
+    for endpoint, valores in list(origen.items()):
+        total = destino.get(endpoint)
+        if total is None:
+            total = destino[endpoint] = _nuevo()
+        for i in (_PEDIDOS, _ERRORES, _SEGUNDOS, _SEGUNDOS_DB):
+            total[i] += valores[i]
+        for i, cantidad in enumerate(valores[_BUCKETS]):
+            total[_BUCKETS][i] += cantidad
+
+
+def totales():
+    """{endpoint: [pedidos, errores, segundos, segundos_db, buckets]} de todo el proceso"""
+    with _lock_registro:
+        _consolidar_terminados()
+        vivos = list(_hilos)
+        resultado = {}
+        _sumar(resultado, _retirados)
+    for _, datos in vivos:
+        _sumar(resultado, datos)
+    return resultado
+
+
+def _etiquetas(endpoint, **extra):
+    blueprint = endpoint.split('.')[0] if '.' in endpoint else ''
+    etiquetas = {'endpoint': endpoint, 'blueprint': blueprint, **extra}
+    return '{' + ','.join(f'{k}="{v}"' for k, v in etiquetas.items()) + '}'
+
+
+def formato_prometheus(datos):
+    lineas = [
+        f'# HELP {PREFIJO}_http_request_duration_seconds Latencia de los pedidos por endpoint',
+        f'# TYPE {PREFIJO}_http_request_duration_seconds histogram',
+    ]
+    for endpoint, valores in sorted(datos.items()):
+        acumulado = 0
+        for limite, cantidad in zip(BUCKETS + ('+Inf',), valores[_BUCKETS]):
+            acumulado += cantidad
+            lineas.append(f'{PREFIJO}_http_request_duration_seconds_bucket'
+                          f'{_etiquetas(endpoint, le=limite)} {acumulado}')
+        lineas.append(f'{PREFIJO}_http_request_duration_seconds_sum{_etiquetas(endpoint)} {valores[_SEGUNDOS]:.6f}')
+        lineas.append(f'{PREFIJO}_http_request_duration_seconds_count{_etiquetas(endpoint)} {valores[_PEDIDOS]}')
+
+    for nombre, ayuda, indice, formato in (
+        ('http_requests_total', 'Pedidos atendidos por endpoint', _PEDIDOS, '{}'),
+        ('http_errors_total', 'Pedidos con respuesta 5xx por endpoint', _ERRORES, '{}'),
+        ('db_seconds_total', 'Tiempo en la base de datos por endpoint', _SEGUNDOS_DB, '{:.6f}'),
+    ):
+        lineas.append(f'# HELP {PREFIJO}_{nombre} {ayuda}')
+        lineas.append(f'# TYPE {PREFIJO}_{nombre} counter')
+        for endpoint, valores in sorted(datos.items()):
+            lineas.append(f'{PREFIJO}_{nombre}{_etiquetas(endpoint)} {formato.format(valores[indice])}')
+    return '\n'.join(lineas) + '\n'
+
+
+def _metricas():
+    token = current_app.config.get('METRICAS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('No autorizado\n', status=401, mimetype='text/plain')
+    return Response(formato_prometheus(totales()), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+    """Registra la medición de cada pedido y el endpoint /metrics"""
+    if not app.config.get('METRICAS_HABILITADAS', True):
+        return
+    app.before_request(_iniciar)
+    app.after_request(_registrar)
+    app.add_url_rule('/metrics', 'metricas_prometheus', _metricas)
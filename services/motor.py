@@ -0,0 +1,76 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from models import db
+
+# Perfiles del motor de base de datos, elegidos con DB_PERFIL (auto = según la URL)
+PERFILES = ('auto', 'sqlite', 'mysql', 'ninguno')
+
+# Valores por defecto; cada uno se puede cambiar en la configuración
+SQLITE_BUSY_TIMEOUT_MS = 5000
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+SQLITE_CACHE_KB = 20000
+DB_POOL_SIZE = 10
+DB_MAX_OVERFLOW = 20
+# Menor que el wait_timeout habitual de los MySQL compartidos (300 s)
+DB_POOL_RECYCLE = 280
+
+
+def perfil_de(app):
+    perfil = app.config.get('DB_PERFIL') or 'auto'
+    if perfil not in PERFILES:
+        raise ValueError(f'DB_PERFIL inválido: {perfil} (opciones: {", ".join(PERFILES)})')
+    if perfil == 'auto':
+        backend = make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+        perfil = backend if backend in ('sqlite', 'mysql') else 'ninguno'
+    return perfil
+
+
+def pragmas_sqlite(config):
+    """PRAGMAs que se ejecutan en cada conexión nueva"""
+    return {
+        # WAL: las lecturas no esperan a la escritura en curso
+        'journal_mode': 'WAL',
+        # Con WAL, NORMAL no arriesga la integridad: solo la última transacción ante un corte de luz
+        'synchronous': 'NORMAL',
+        'busy_timeout': config.get('SQLITE_BUSY_TIMEOUT_MS', SQLITE_BUSY_TIMEOUT_MS),
+        'mmap_size': config.get('SQLITE_MMAP_SIZE', SQLITE_MMAP_SIZE),
+        # Negativo: tamaño en KiB en lugar de páginas
+        'cache_size': -config.get('SQLITE_CACHE_KB', SQLITE_CACHE_KB),
+    }
+
+
+def opciones_mysql(config):
+    return {
+        'pool_size': config.get('DB_POOL_SIZE', DB_POOL_SIZE),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', DB_MAX_OVERFLOW),
+        # Descarta conexiones cortadas por el servidor antes de usarlas
+        'pool_pre_ping': True,
+        'pool_recycle': config.get('DB_POOL_RECYCLE', DB_POOL_RECYCLE),
+    }
+
+
+def configurar(app):
+    """Agrega las opciones del motor del perfil elegido; llamar antes de db.init_app"""
+    perfil = app.config['DB_PERFIL'] = perfil_de(app)
+    if perfil == 'mysql':
+        opciones = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        for clave, valor in opciones_mysql(app.config).items():
+            opciones.setdefault(clave, valor)
+
+
+def init_app(app):
+    """Con el perfil sqlite ejecuta los PRAGMAs al abrir cada conexión (también en la réplica)"""
+    if app.config.get('DB_PERFIL') != 'sqlite':
+        return
+    pragmas = pragmas_sqlite(app.config)
+    with app.app_context():
+        engines = [e for e in db.engines.values() if e.url.get_backend_name() == 'sqlite']
+
+    def _pragmas(conexion_dbapi, registro):
+        cursor = conexion_dbapi.cursor()
+        for nombre, valor in pragmas.items():
+            cursor.execute(f'PRAGMA {nombre}={valor}')
+        cursor.close()
+
+    for engine in engines:
+        event.listen(engine, 'connect', _pragmas)
@@ -0,0 +1,132 @@
+from datetime import datetime
+from sqlalchemy import func, insert, literal, select, update
+from models import db, Producto, Variante, HistorialPrecio
+
+OPERACIONES = ('porcentaje', 'monto', 'fijo')
+
+# Filas de ejemplo que devuelve la vista previa
+LIMITE_PREVIA = 50
+
+
+class AjusteInvalido(ValueError):
+    """El ajuste dejaría precios negativos o no tiene una operación válida"""
+
+
+def _condiciones_producto(filtros):
+    condiciones = []
+    if filtros.get('club_id'):
+        condiciones.append(Producto.club_id == filtros['club_id'])
+    if filtros.get('categoria_id'):
+        condiciones.append(Producto.categoria_id == filtros['categoria_id'])
+    if filtros.get('temporada'):
+        condiciones.append(Producto.temporada == filtros['temporada'])
+    return condiciones
+
+
+def _condiciones_variante(filtros):
+    """Condiciones sobre Variante sin JOIN, para usarlas también en el UPDATE"""
+    condiciones = []
+    de_producto = _condiciones_producto(filtros)
+    if de_producto:
+        condiciones.append(Variante.producto_id.in_(select(Producto.id).where(*de_producto)))
+    if filtros.get('talle'):
+        condiciones.append(Variante.talle == filtros['talle'])
+    return condiciones
+
+
+def _condiciones_productos_afectados(filtros):
+    """Productos con precio base a ajustar: los filtrados que tienen el talle pedido"""
+    condiciones = _condiciones_producto(filtros)
+    if filtros.get('talle'):
+        condiciones.append(Producto.id.in_(
+            select(Variante.producto_id).where(Variante.talle == filtros['talle'])
+        ))
+    return condiciones
+
+
+def _precio_nuevo(columna, operacion, valor):
+    if operacion == 'porcentaje':
+        return func.round(columna * (1 + valor / 100.0), 2)
+    if operacion == 'monto':
+        return func.round(columna + valor, 2)
+    if operacion == 'fijo':
+        return literal(round(valor, 2))
+    raise AjusteInvalido(f'Operación inválida: {operacion}')
+
+
+def _verificar(nuevo, condiciones):
+    minimo = db.session.execute(select(func.min(nuevo)).where(*condiciones)).scalar()
+    if minimo is not None and minimo < 0:
+        raise AjusteInvalido('El ajuste deja precios negativos')
+
+
+def previsualizar(filtros, operacion, valor, limite=LIMITE_PREVIA):
+    """Cantidad de variantes afectadas, rango de precios resultante y algunas filas de ejemplo"""
+    nuevo = _precio_nuevo(Variante.precio, operacion, valor)
+    condiciones = _condiciones_variante(filtros)
+
+    resumen = db.session.execute(
+        select(
+            func.count(Variante.id).label('total'),
+            func.min(nuevo).label('minimo'),
+            func.max(nuevo).label('maximo')
+        ).where(*condiciones)
+    ).one()
+    filas = db.session.execute(
+        select(
+            Variante.id,
+            Variante.sku,
+            Variante.talle,
+            Producto.nombre.label('producto_nombre'),
+            Variante.precio.label('precio_anterior'),
+            nuevo.label('precio_nuevo')
+        ).join(Producto, Variante.producto_id == Producto.id)
+        .where(*condiciones)
+        .order_by(Producto.nombre, Variante.talle, Variante.id)
+        .limit(limite)
+    ).all()
+    return {'total': resumen.total, 'minimo': resumen.minimo, 'maximo': resumen.maximo, 'filas': filas}
+
+
+def ajustar_precios(filtros, operacion, valor, usuario, incluir_productos=False, motivo=None):
+    """Cambia el precio de todas las variantes filtradas con un único UPDATE.
+
+    El historial se escribe antes, con un INSERT ... SELECT que lee el precio
+    anterior y calcula el nuevo con la misma expresión; ambos van en la misma
+    transacción. filtros admite club_id, categoria_id, temporada y talle.
+    Devuelve (variantes, productos) actualizados.
+    """
+    condiciones = _condiciones_variante(filtros)
+    nuevo = _precio_nuevo(Variante.precio, operacion, valor)
+    _verificar(nuevo, condiciones)
+    if incluir_productos:
+        condiciones_base = _condiciones_productos_afectados(filtros)
+        nuevo_base = _precio_nuevo(func.coalesce(Producto.precio, 0), operacion, valor)
+        _verificar(nuevo_base, condiciones_base)
+
+    ahora = datetime.utcnow()
+    motivo = motivo or f'Ajuste masivo ({operacion} {valor:g})'
+
+    db.session.execute(insert(HistorialPrecio).from_select(
+        ['fecha', 'variante_id', 'precio_anterior', 'precio_nuevo', 'motivo', 'usuario'],
+        select(literal(ahora), Variante.id, Variante.precio, nuevo, literal(motivo), literal(usuario))
+        .where(*condiciones)
+    ))
+    variantes = db.session.execute(
+        update(Variante).where(*condiciones).values(precio=nuevo)
+        .execution_options(synchronize_session=False, columnas_modificadas=('precio',))
+    ).rowcount
+
+    productos = 0
+    if incluir_productos:
+        db.session.execute(insert(HistorialPrecio).from_select(
+            ['fecha', 'producto_id', 'precio_anterior', 'precio_nuevo', 'motivo', 'usuario'],
+            select(literal(ahora), Producto.id, Producto.precio, nuevo_base, literal(motivo), literal(usuario))
+            .where(*condiciones_base)
+        ))
+        productos = db.session.execute(
+            update(Producto).where(*condiciones_base).values(precio=nuevo_base)
+            .execution_options(synchronize_session=False, columnas_modificadas=('precio',))
+        ).rowcount
+
+    return variantes, productos
@@ -0,0 +1,95 @@
+import sqlite3
+import time
+from functools import wraps
+from flask import Blueprint, current_app, g, has_request_context, request, session as sesion_web
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+
+# Tras una escritura, el mismo usuario lee de la primaria durante este margen
+# (segundos) para ver sus propios cambios aunque la réplica venga atrasada
+RETRASO_MAXIMO = 10
+
+BIND = 'replica'
+
+
+def _activar():
+    """Las consultas de este pedido van a la réplica si corresponde"""
+    if request.method not in ('GET', 'HEAD'):
+        return
+    if sesion_web.get('primaria_hasta', 0) > time.time():
+        return
+    g.usar_replica = True
+
+
+def usar_replica(objetivo):
+    """Decorador de vista, o función sobre un Blueprint entero: sus lecturas van a la réplica.
+
+    Solo se enrutan los pedidos GET/HEAD. Sin réplica configurada no tiene efecto.
+    En una vista conviene aplicarlo debajo de login_required, para que el usuario
+    se cargue de la primaria.
+    """
+    if isinstance(objetivo, Blueprint):
+        objetivo.before_request(_activar)
+        return objetivo
+
+    @wraps(objetivo)
+    def vista(*args, **kwargs):
+        _activar()
+        return objetivo(*args, **kwargs)
+    return vista
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _enrutar(estado):
+    """Manda los SELECT a la réplica mientras la sesión no haya escrito nada.
+
+    execution_options(solo_primaria=True) fuerza la primaria para una sentencia.
+    """
+    session = estado.session
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        session.info['escritura'] = True
+        return None
+    if not estado.is_select or session.info.get('escritura') or estado.execution_options.get('solo_primaria'):
+        return None
+    if not has_request_context() or not g.get('usar_replica'):
+        return None
+    replica = db.engines.get(BIND)
+    if replica is None:
+        return None
+    return estado.invoke_statement(bind_arguments={'bind': replica})
+
+
+@event.listens_for(Session, 'after_flush')
+def _escritura(session, contexto):
+    session.info['escritura'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _leer_propias_escrituras(session):
+    if session.info.get('escritura') and has_request_context():
+        retraso = current_app.config.get('REPLICA_RETRASO_MAXIMO', RETRASO_MAXIMO)
+        sesion_web['primaria_hasta'] = time.time() + retraso
+
+
+def sincronizar():
+    """Copia la base primaria sobre la réplica cuando ambas son archivos SQLite.
+
+    Sirve para probar el enrutamiento en una máquina local: usa la API de backup
+    de SQLite, que toma una copia consistente aunque la primaria esté en uso.
+    """
+    replica = db.engines.get(BIND)
+    if replica is None:
+        raise ValueError('No hay réplica configurada (DATABASE_REPLICA_URL)')
+    rutas = []
+    for engine in (db.engine, replica):
+        if engine.url.get_backend_name() != 'sqlite' or not engine.url.database:
+            raise ValueError(f'La copia solo admite archivos SQLite: {engine.url}')
+        rutas.append(engine.url.database)
+
+    fuente, copia = sqlite3.connect(rutas[0]), sqlite3.connect(rutas[1])
+    try:
+        fuente.backup(copia)
+    finally:
+        copia.close()
+        fuente.close()
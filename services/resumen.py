@@ -0,0 +1,192 @@
+from collections import defaultdict
+from datetime import date, datetime
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+from models import db, Venta, VentaItem, Variante, Producto, ResumenVentaDiario
+from services.cambios import sumar
+
+_tabla = ResumenVentaDiario.__table__
+
+
+def _dia(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return datetime.fromisoformat(str(valor)).date()
+
+
+def _upsert(conexion, filas):
+    """Suma las filas al resumen con un único INSERT ... ON CONFLICT / ON DUPLICATE KEY"""
+    dialecto = conexion.dialect.name
+    if dialecto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as insert_dialecto
+        sentencia = insert_dialecto(_tabla)
+        nuevos = sentencia.excluded
+        sentencia = sentencia.on_conflict_do_update(
+            index_elements=['fecha', 'club_id', 'categoria_id', 'tipo_venta'],
+            set_={
+                'unidades': _tabla.c.unidades + nuevos.unidades,
+                'recaudacion': _tabla.c.recaudacion + nuevos.recaudacion,
+                'tickets': _tabla.c.tickets + nuevos.tickets
+            }
+        )
+        conexion.execute(sentencia, filas)
+    elif dialecto == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as insert_dialecto
+        sentencia = insert_dialecto(_tabla)
+        nuevos = sentencia.inserted
+        sentencia = sentencia.on_duplicate_key_update(
+            unidades=_tabla.c.unidades + nuevos.unidades,
+            recaudacion=_tabla.c.recaudacion + nuevos.recaudacion,
+            tickets=_tabla.c.tickets + nuevos.tickets
+        )
+        conexion.execute(sentencia, filas)
+    else:
+        # Otros motores: UPDATE y, si no existía la fila, INSERT
+        for fila in filas:
+            resultado = conexion.execute(
+                update(_tabla).where(
+                    _tabla.c.fecha == fila['fecha'],
+                    _tabla.c.club_id == fila['club_id'],
+                    _tabla.c.categoria_id == fila['categoria_id'],
+                    _tabla.c.tipo_venta == fila['tipo_venta']
+                ).values(
+                    unidades=_tabla.c.unidades + fila['unidades'],
+                    recaudacion=_tabla.c.recaudacion + fila['recaudacion'],
+                    tickets=_tabla.c.tickets + fila['tickets']
+                )
+            )
+            if resultado.rowcount == 0:
+                conexion.execute(insert(_tabla), [fila])
+
+
+def acumular(conexion, items):
+    """Suma al resumen diario los items de venta recién insertados.
+
+    items: dicts con venta_id, variante_id, cantidad y subtotal. Resuelve club,
+    categoría, fecha y tipo de venta con dos consultas y aplica un upsert.
+    Un ticket cuenta una vez en cada combinación en la que tiene items.
+    Devuelve las filas sumadas al resumen.
+    """
+    items = [i for i in items if i.get('venta_id') and i.get('variante_id')]
+    if not items:
+        return []
+
+    dimensiones = {
+        fila.id: (fila.club_id, fila.categoria_id)
+        for fila in conexion.execute(
+            select(Variante.id, Producto.club_id, Producto.categoria_id)
+            .join(Producto, Variante.producto_id == Producto.id)
+            .where(Variante.id.in_({i['variante_id'] for i in items}))
+        )
+    }
+    ventas = {
+        fila.id: (_dia(fila.fecha_venta), fila.tipo_venta or '')
+        for fila in conexion.execute(
+            select(Venta.id, Venta.fecha_venta, Venta.tipo_venta)
+            .where(Venta.id.in_({i['venta_id'] for i in items}))
+        )
+    }
+
+    acumulado = defaultdict(lambda: {'unidades': 0, 'recaudacion': 0.0, 'tickets': set()})
+    for item in items:
+        if item['variante_id'] not in dimensiones or item['venta_id'] not in ventas:
+            continue
+        fecha, tipo_venta = ventas[item['venta_id']]
+        club_id, categoria_id = dimensiones[item['variante_id']]
+        fila = acumulado[(fecha, club_id, categoria_id, tipo_venta)]
+        fila['unidades'] += item['cantidad']
+        fila['recaudacion'] += item['subtotal']
+        fila['tickets'].add(item['venta_id'])
+
+    filas = [
+        {
+            'fecha': fecha,
+            'club_id': club_id,
+            'categoria_id': categoria_id,
+            'tipo_venta': tipo_venta,
+            'unidades': valores['unidades'],
+            'recaudacion': valores['recaudacion'],
+            'tickets': len(valores['tickets'])
+        }
+        for (fecha, club_id, categoria_id, tipo_venta), valores in acumulado.items()
+    ]
+    if filas:
+        _upsert(conexion, filas)
+    return filas
+
+
+def _acumular_en_sesion(session, items):
+    """acumular() en la transacción de la sesión, anotando la recaudación por día en sus cambios"""
+    for fila in acumular(session.connection(), items):
+        sumar(session, _tabla.name, ('recaudacion', fila['fecha']), fila['recaudacion'])
+
+
+def _como_dict(item):
+    return {
+        'venta_id': item.venta_id,
+        'variante_id': item.variante_id,
+        'cantidad': item.cantidad,
+        'subtotal': item.subtotal
+    }
+
+
+@event.listens_for(Session, 'after_flush')
+def _items_del_flush(session, contexto):
+    """VentaItem agregados a la sesión: se acumulan en la misma transacción del flush"""
+    items = [_como_dict(obj) for obj in session.new if isinstance(obj, VentaItem)]
+    if items:
+        _acumular_en_sesion(session, items)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _items_en_bloque(estado):
+    """insert(VentaItem) en bloque (services.ventas) no pasa por el flush: se intercepta aquí"""
+    if not estado.is_insert or estado.bind_mapper is not VentaItem.__mapper__:
+        return None
+    parametros = estado.parameters
+    if not isinstance(parametros, list):
+        return None
+
+    resultado = estado.invoke_statement()
+    _acumular_en_sesion(estado.session, parametros)
+    return resultado
+
+
+def reconstruir():
+    """Recalcula todo el resumen desde el historial con un INSERT ... SELECT agrupado"""
+    dia = func.date(Venta.fecha_venta)
+    tipo_venta = func.coalesce(Venta.tipo_venta, '')
+    origen = select(
+        dia,
+        Producto.club_id,
+        Producto.categoria_id,
+        tipo_venta,
+        func.sum(VentaItem.cantidad),
+        func.sum(VentaItem.subtotal),
+        func.count(func.distinct(Venta.id))
+    ).select_from(VentaItem)\
+        .join(Venta, VentaItem.venta_id == Venta.id)\
+        .join(Variante, VentaItem.variante_id == Variante.id)\
+        .join(Producto, Variante.producto_id == Producto.id)\
+        .group_by(dia, Producto.club_id, Producto.categoria_id, tipo_venta)
+
+    conexion = db.session.connection()
+    conexion.execute(delete(_tabla))
+    resultado = conexion.execute(insert(_tabla).from_select(
+        ['fecha', 'club_id', 'categoria_id', 'tipo_venta', 'unidades', 'recaudacion', 'tickets'],
+        origen
+    ))
+    return resultado.rowcount
+
+
+def totales(fecha_desde, fecha_hasta=None):
+    """(unidades, recaudación) del resumen entre dos días inclusive"""
+    consulta = select(
+        func.coalesce(func.sum(ResumenVentaDiario.unidades), 0),
+        func.coalesce(func.sum(ResumenVentaDiario.recaudacion), 0)
+    ).where(ResumenVentaDiario.fecha >= fecha_desde)
+    if fecha_hasta is not None:
+        consulta = consulta.where(ResumenVentaDiario.fecha <= fecha_hasta)
+    return db.session.execute(consulta).one()
@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import select
+from models import db, Producto, Variante
+from services.cambios import al_confirmar
+
+# Cantidad de SKUs que se guardan en memoria (se descartan los menos usados)
+SKU_CACHE_MAX = 5000
+
+# Respaldo para despliegues con varios procesos, igual que en services.metricas
+SKU_CACHE_TTL = 60
+
+# Máximo de SKUs aceptados en una consulta por lote
+MAX_SKUS_POR_CONSULTA = 1000
+
+# Columnas de productos que se copian en la caché
+_COLUMNAS_PRODUCTO = {'nombre'}
+
+_lock = threading.Lock()
+_cache = OrderedDict()  # sku -> (datos, variante_id, producto_id, expira)
+_por_variante = {}      # variante_id -> sku
+_generacion = 0
+
+
+def _consultar(skus):
+    filas = db.session.execute(
+        select(
+            Variante.id,
+            Variante.sku,
+            Variante.talle,
+            Variante.stock,
+            Variante.precio,
+            Variante.producto_id,
+            Producto.nombre.label('producto')
+        ).join(Producto, Variante.producto_id == Producto.id)
+        .where(Variante.sku.in_(skus)),
+        execution_options={'solo_primaria': True}  # queda cacheado: nunca de la réplica
+    ).all()
+    return {
+        fila.sku: ({
+            'sku': fila.sku,
+            'producto': fila.producto,
+            'talle': fila.talle,
+            'stock': fila.stock,
+            'precio': fila.precio
+        }, fila.id, fila.producto_id)
+        for fila in filas
+    }
+
+
+def consultar_skus(skus):
+    """Stock, precio y producto de cada SKU; {sku: datos} sin los inexistentes.
+
+    Los SKUs que no están en caché se buscan con una sola consulta.
+    """
+    skus = list(dict.fromkeys(skus))
+    ahora = time.monotonic()
+    resultado = {}
+
+    with _lock:
+        for sku in skus:
+            entrada = _cache.get(sku)
+            if entrada and entrada[3] > ahora:
+                _cache.move_to_end(sku)
+                resultado[sku] = entrada[0]
+        generacion = _generacion
+
+    faltantes = [sku for sku in skus if sku not in resultado]
+    if not faltantes:
+        return resultado
+
+    encontrados = _consultar(faltantes)
+    maximo = current_app.config.get('SKU_CACHE_MAX', SKU_CACHE_MAX)
+    expira = ahora + current_app.config.get('SKU_CACHE_TTL', SKU_CACHE_TTL)
+    with _lock:
+        # Si hubo un commit mientras se consultaba, no se guarda un valor posiblemente viejo
+        guardar = generacion == _generacion
+        for sku, (datos, variante_id, producto_id) in encontrados.items():
+            resultado[sku] = datos
+            if guardar:
+                _cache[sku] = (datos, variante_id, producto_id, expira)
+                _cache.move_to_end(sku)
+                _por_variante[variante_id] = sku
+        while len(_cache) > maximo:
+            _, entrada = _cache.popitem(last=False)
+            _por_variante.pop(entrada[1], None)
+
+    return resultado
+
+
+def consultar_sku(sku):
+    """Datos de un SKU o None si no existe"""
+    return consultar_skus([sku]).get(sku)
+
+
+def _limpiar():
+    _cache.clear()
+    _por_variante.clear()
+
+
+@al_confirmar
+def _invalidar(cambios):
+    """Descarta los SKUs afectados por un commit"""
+    global _generacion
+    variantes = cambios.get('variantes')
+    productos = cambios.get('productos')
+    if productos and productos['columnas'] is not None and not productos['columnas'] & _COLUMNAS_PRODUCTO:
+        productos = None
+    if not variantes and not productos:
+        return
+
+    with _lock:
+        _generacion += 1
+        if (variantes and variantes['ids'] is None) or (productos and productos['ids'] is None):
+            _limpiar()
+            return
+        if variantes:
+            for variante_id in variantes['ids']:
+                sku = _por_variante.pop(variante_id, None)
+                if sku is not None:
+                    _cache.pop(sku, None)
+        if productos:
+            for sku, entrada in list(_cache.items()):
+                if entrada[2] in productos['ids']:
+                    del _cache[sku]
+                    _por_variante.pop(entrada[1], None)
+
+
+def invalidar():
+    global _generacion
+    with _lock:
+        _generacion += 1
+        _limpiar()
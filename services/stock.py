@@ -0,0 +1,177 @@
+from sqlalchemy import insert, select, update, func, case
+from sqlalchemy.exc import OperationalError
+from models import db, Variante, MovimientoStock
+
+
+class StockInsuficiente(Exception):
+    """La variante no tiene stock suficiente (o no existe) para aplicar el movimiento"""
+    def __init__(self, variante_id):
+        super().__init__(f'Stock insuficiente para la variante {variante_id}')
+        self.variante_id = variante_id
+
+
+class StockConflicto(Exception):
+    """Otra transacción modificó la variante en todos los reintentos"""
+
+
+def _delta(tipo, cantidad):
+    return cantidad if tipo == 'entrada' else -cantidad
+
+
+def _aplicar_delta(variante_id, delta, version=None):
+    """UPDATE condicional ejecutado en la base: nunca lee el stock en Python.
+
+    Solo modifica la fila si el stock resultante no queda negativo (y, si se
+    indica, si la versión sigue siendo la leída). Devuelve True si se aplicó.
+    """
+    stock_actual = func.coalesce(Variante.stock, 0)
+    condiciones = [Variante.id == variante_id, stock_actual + delta >= 0]
+    if version is not None:
+        condiciones.append(Variante.version == version)
+
+    resultado = db.session.execute(
+        update(Variante)
+        .where(*condiciones)
+        .values(stock=stock_actual + delta, version=Variante.version + 1)
+        .execution_options(
+            synchronize_session=False,
+            ids_modificados=(variante_id,),
+            columnas_modificadas=('stock', 'version')
+        )
+    )
+    return resultado.rowcount == 1
+
+
+def _aplicar_deltas(deltas):
+    """Aplica {variante_id: delta} con un único UPDATE ... CASE id ... END.
+
+    Cada fila lleva la misma condición que _aplicar_delta, así que las que no
+    alcanzan quedan sin tocar. Devuelve el conjunto de ids aplicados: con
+    RETURNING (SQLite, PostgreSQL) sale del mismo UPDATE; sin él (MySQL) solo
+    se compara el rowcount, dentro de un savepoint que se deshace si faltó
+    alguna fila, y en ese caso se vuelve a un UPDATE por variante.
+    """
+    stock_actual = func.coalesce(Variante.stock, 0)
+    delta = case(deltas, value=Variante.id)
+    sentencia = (
+        update(Variante)
+        .where(Variante.id.in_(deltas), stock_actual + delta >= 0)
+        .values(stock=stock_actual + delta, version=Variante.version + 1)
+        .execution_options(
+            synchronize_session=False,
+            ids_modificados=tuple(deltas),
+            columnas_modificadas=('stock', 'version')
+        )
+    )
+
+    if db.session.get_bind().dialect.update_returning:
+        return set(db.session.execute(sentencia.returning(Variante.id)).scalars())
+
+    savepoint = db.session.begin_nested()
+    try:
+        completo = db.session.execute(sentencia).rowcount == len(deltas)
+    except OperationalError:
+        savepoint.rollback()
+        raise
+    if completo:
+        savepoint.commit()
+        return set(deltas)
+    savepoint.rollback()
+    return {variante_id for variante_id, d in deltas.items() if _aplicar_delta(variante_id, d)}
+
+
+def _es_bloqueo(error):
+    # SQLite: "database is locked" al vencer busy_timeout; MySQL: 1205 (lock wait timeout)
+    mensaje = str(error.orig)
+    return 'locked' in mensaje or 'Lock wait timeout' in mensaje
+
+
+def _insertar_movimientos(movimientos):
+    if movimientos:
+        db.session.execute(insert(MovimientoStock), movimientos)
+
+
+def aplicar_movimientos(movimientos, usuario, reintentos=3):
+    """Aplica varios movimientos (variante_id, tipo, cantidad, motivo) de forma atómica.
+
+    Todas las variantes se actualizan con un único UPDATE condicional (la
+    cantidad de consultas no crece con el carrito) y los MovimientoStock de
+    los que se aplicaron se insertan juntos en un único executemany. Si la
+    base está bloqueada por otra escritura se reintenta hasta `reintentos`
+    veces antes de lanzar StockConflicto.
+    Devuelve (aplicados, rechazados) como listas de variante_id.
+    """
+    deltas = {}
+    for variante_id, tipo, cantidad, _ in movimientos:
+        deltas[variante_id] = deltas.get(variante_id, 0) + _delta(tipo, cantidad)
+    if not deltas:
+        return [], []
+
+    for _ in range(reintentos):
+        try:
+            if len(deltas) == 1:
+                variante_id, delta = next(iter(deltas.items()))
+                ids_aplicados = {variante_id} if _aplicar_delta(variante_id, delta) else set()
+            else:
+                ids_aplicados = _aplicar_deltas(deltas)
+            break
+        except OperationalError as e:
+            # Solo falló la sentencia: la transacción sigue abierta y se reintenta
+            if not _es_bloqueo(e):
+                raise
+            bloqueo = e
+    else:
+        raise StockConflicto(f'Stock bloqueado por otra transacción tras {reintentos} intentos') from bloqueo
+
+    _insertar_movimientos([
+        {
+            'variante_id': variante_id,
+            'tipo': tipo,
+            'cantidad': cantidad,
+            'motivo': motivo,
+            'usuario': usuario
+        }
+        for variante_id, tipo, cantidad, motivo in movimientos
+        if variante_id in ids_aplicados
+    ])
+    aplicados = [variante_id for variante_id in deltas if variante_id in ids_aplicados]
+    rechazados = [variante_id for variante_id in deltas if variante_id not in ids_aplicados]
+    return aplicados, rechazados
+
+
+def registrar_movimiento(variante_id, tipo, cantidad, motivo, usuario):
+    """Aplica un único movimiento; lanza StockInsuficiente si no hay stock"""
+    aplicados, _ = aplicar_movimientos([(variante_id, tipo, cantidad, motivo)], usuario)
+    if not aplicados:
+        raise StockInsuficiente(variante_id)
+
+
+def fijar_stock(variante_id, stock_nuevo, motivo, usuario, reintentos=3):
+    """Lleva el stock de una variante a un valor absoluto.
+
+    Usa control optimista por versión: si otra transacción cambió la variante
+    entre la lectura y el UPDATE se vuelve a leer, hasta `reintentos` veces.
+    Devuelve la diferencia aplicada (0 si no hubo cambios).
+    """
+    for _ in range(reintentos):
+        fila = db.session.execute(
+            select(Variante.stock, Variante.version).where(Variante.id == variante_id)
+        ).first()
+        if fila is None:
+            raise StockInsuficiente(variante_id)
+
+        diferencia = stock_nuevo - (fila.stock or 0)
+        if diferencia == 0:
+            return 0
+
+        if _aplicar_delta(variante_id, diferencia, version=fila.version):
+            _insertar_movimientos([{
+                'variante_id': variante_id,
+                'tipo': 'entrada' if diferencia > 0 else 'salida',
+                'cantidad': abs(diferencia),
+                'motivo': motivo,
+                'usuario': usuario
+            }])
+            return diferencia
+
+    raise StockConflicto(f'No se pudo actualizar la variante {variante_id} tras {reintentos} intentos')
@@ -0,0 +1,92 @@
+import threading
+import time
+from dataclasses import dataclass
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import select
+from models import db, Usuario
+from services.cambios import al_confirmar
+
+# Respaldo para despliegues con varios procesos, igual que en services.metricas
+USUARIO_CACHE_TTL = 60
+
+_lock = threading.Lock()
+_cache = {}  # usuario_id -> (UsuarioSesion, expira)
+_generacion = 0
+
+
+@dataclass(frozen=True)
+class UsuarioSesion(UserMixin):
+    """Copia inmutable del usuario logueado: no está ligada a ninguna sesión de SQLAlchemy"""
+    id: int
+    username: str
+    nombre: str
+    email: str
+    rol: str
+    activo: bool
+
+    @property
+    def is_active(self):
+        return self.activo
+
+
+def _consultar(usuario_id):
+    fila = db.session.execute(
+        select(Usuario.id, Usuario.username, Usuario.nombre, Usuario.email, Usuario.rol, Usuario.activo)
+        .where(Usuario.id == usuario_id),
+        execution_options={'solo_primaria': True}  # queda cacheado: nunca de la réplica
+    ).first()
+    if fila is None:
+        return None
+    # activo NULL se toma como activo, como antes de que existiera el control
+    return UsuarioSesion(**dict(fila._asdict(), activo=fila.activo is not False))
+
+
+def cargar_usuario(usuario_id):
+    """Usuario para Flask-Login; None si no existe o está desactivado.
+
+    Lo habitual es resolverlo desde la caché, sin consultar la base.
+    """
+    ahora = time.monotonic()
+    with _lock:
+        entrada = _cache.get(usuario_id)
+        if entrada and entrada[1] > ahora:
+            usuario = entrada[0]
+            return usuario if usuario.activo else None
+        generacion = _generacion
+
+    usuario = _consultar(usuario_id)
+    if usuario is None:
+        return None
+    with _lock:
+        # Si hubo un commit sobre usuarios mientras se consultaba, no se guarda
+        if generacion == _generacion:
+            _cache[usuario_id] = (usuario, ahora + current_app.config.get('USUARIO_CACHE_TTL', USUARIO_CACHE_TTL))
+    return usuario if usuario.activo else None
+
+
+@al_confirmar
+def _invalidar(cambios):
+    """Descarta los usuarios creados, modificados o borrados en un commit"""
+    global _generacion
+    usuarios = cambios.get('usuarios')
+    if not usuarios:
+        return
+    with _lock:
+        _generacion += 1
+        if usuarios['ids'] is None:
+            _cache.clear()
+            return
+        for usuario_id in usuarios['ids']:
+            _cache.pop(usuario_id, None)
+
+
+def invalidar(usuario_id=None):
+    """Descarta un usuario de la caché, o todos si no se indica"""
+    global _generacion
+    with _lock:
+        _generacion += 1
+        if usuario_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(usuario_id, None)
@@ -0,0 +1,96 @@
+from sqlalchemy import insert
+from models import db, Venta, VentaItem, Variante, MovimientoCaja
+from services.stock import aplicar_movimientos
+from services.caja import obtener_caja, consolidar_si_corresponde
+
+
+def parsear_items(items):
+    """Convierte la lista 'variante_cantidad' del formulario en {variante_id: cantidad}"""
+    cantidades = {}
+    for item in items:
+        try:
+            variante_id, cantidad = map(int, item.split('_'))
+        except ValueError:
+            continue
+        if cantidad <= 0:
+            continue
+        # Si la misma variante aparece dos veces se suman las cantidades
+        cantidades[variante_id] = cantidades.get(variante_id, 0) + cantidad
+    return cantidades
+
+
+def registrar_venta(items, cliente_id, usuario, tipo_venta='fisica'):
+    """Registra una venta completa con una cantidad fija de consultas.
+
+    Todas las variantes del carrito se cargan con un único SELECT ... IN (...),
+    el stock se valida en memoria, se descuenta con un solo UPDATE de
+    services.stock y los items se insertan en bloque.
+    Devuelve (venta, advertencias); venta es None si ningún item fue válido.
+    """
+    cantidades = parsear_items(items)
+    advertencias = []
+    if not cantidades:
+        return None, advertencias
+
+    variantes = Variante.query.options(
+        db.joinedload(Variante.producto)
+    ).filter(Variante.id.in_(cantidades)).all()
+
+    validas = []
+    for variante in variantes:
+        cantidad = cantidades[variante.id]
+        if (variante.stock or 0) < cantidad:
+            advertencias.append(f'Stock insuficiente para {variante.producto.nombre} - Talle: {variante.talle}')
+            continue
+        validas.append((variante, cantidad))
+
+    if not validas:
+        return None, advertencias
+
+    venta = Venta(cliente_id=cliente_id, tipo_venta=tipo_venta, total=0)
+    db.session.add(venta)
+    db.session.flush()
+
+    # El descuento real se hace con un único UPDATE condicional para todo el
+    # carrito: si otra caja vendió la última unidad entre la lectura y este
+    # punto, ese item se rechaza.
+    aplicados, rechazados = aplicar_movimientos(
+        [(variante.id, 'salida', cantidad, f'Venta #{venta.id}') for variante, cantidad in validas],
+        usuario
+    )
+    for variante, _ in validas:
+        if variante.id in rechazados:
+            advertencias.append(f'Stock insuficiente para {variante.producto.nombre} - Talle: {variante.talle}')
+    validas = [(variante, cantidad) for variante, cantidad in validas if variante.id in aplicados]
+
+    if not validas:
+        return None, advertencias
+
+    total_venta = sum(variante.precio * cantidad for variante, cantidad in validas)
+    venta.total = total_venta
+
+    # La caja es un libro de solo-agregado: no se reescribe ninguna fila compartida
+    caja = obtener_caja()
+    movimiento_caja = MovimientoCaja(
+        caja_id=caja.id,
+        tipo='ingreso',
+        monto=total_venta,
+        motivo=f'Venta #{venta.id}'
+    )
+    db.session.add(movimiento_caja)
+    db.session.flush()
+    venta.movimiento_caja_id = movimiento_caja.id
+    consolidar_si_corresponde(caja.id, movimiento_caja.id)
+
+    db.session.execute(insert(VentaItem), [
+        {
+            'venta_id': venta.id,
+            'variante_id': variante.id,
+            'cantidad': cantidad,
+            'precio_unitario': variante.precio,
+            'subtotal': variante.precio * cantidad
+        }
+        for variante, cantidad in validas
+    ])
+
+    return venta, advertencias
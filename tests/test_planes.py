@@ -0,0 +1,70 @@
+"""Cada listado, exportación y reporte debe resolverse con índices.
+
+Uso: python -m pytest tests/test_planes.py
+
+Aplica las migraciones sobre una base SQLite temporal, recorre cada URL de
+benchmarks.planes.CONSULTAS con el cliente de pruebas de Flask y analiza con
+EXPLAIN QUERY PLAN cada SELECT ejecutado: falla si alguno recorre una tabla
+entera (SCAN sin índice) fuera de las permitidas para esa pantalla.
+"""
+import os
+
+import pytest
+
+from benchmarks.planes import CONSULTAS, RAIZ, TABLAS_CHICAS, _escaneos, _preparar
+
+
+@pytest.fixture(scope='module')
+def entorno(tmp_path_factory):
+    """App sobre una base migrada, cliente con sesión iniciada y captura de los SELECT"""
+    anterior = os.environ.get('DATABASE_URL')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + str(tmp_path_factory.mktemp('planes') / 'planes.db')
+    try:
+        from flask_migrate import upgrade
+        from sqlalchemy import event
+        from app import create_app, db
+
+        app = create_app()
+        app.config['WTF_CSRF_ENABLED'] = False
+        with app.app_context():
+            upgrade(directory=os.path.join(RAIZ, 'migrations'))
+            _preparar(db)
+
+            ejecutadas = []
+
+            @event.listens_for(db.engine, 'before_cursor_execute')
+            def _capturar(conexion, cursor, sentencia, parametros, contexto, executemany):
+                if sentencia.lstrip().upper().startswith(('SELECT', 'WITH')):
+                    ejecutadas.append((sentencia, parametros))
+
+            cliente = app.test_client()
+            cliente.post('/login', data={'email': 'planes@tienda.com', 'password': 'planes123'})
+
+            with db.engine.connect() as conexion:
+                yield {
+                    'cliente': cliente,
+                    'conexion': conexion,
+                    'ejecutadas': ejecutadas,
+                    'tablas': set(db.metadata.tables) - TABLAS_CHICAS,
+                }
+            event.remove(db.engine, 'before_cursor_execute', _capturar)
+    finally:
+        if anterior is None:
+            os.environ.pop('DATABASE_URL', None)
+        else:
+            os.environ['DATABASE_URL'] = anterior
+
+
+@pytest.mark.parametrize('nombre, url, permitidas', CONSULTAS, ids=[c[0] for c in CONSULTAS])
+def test_sin_recorridos_completos(entorno, nombre, url, permitidas):
+    entorno['ejecutadas'].clear()
+    respuesta = entorno['cliente'].get(url)
+    assert respuesta.status_code == 200, f'{url} respondió {respuesta.status_code}'
+
+    problemas = []
+    for sentencia, parametros in dict.fromkeys(entorno['ejecutadas']):
+        for tabla, plan in _escaneos(entorno['conexion'], sentencia, parametros,
+                                     entorno['tablas'] - permitidas):
+            problemas.append(f'recorre {tabla}: {" ".join(sentencia.split())[:200]}\n    '
+                             + '\n    '.join(plan))
+    assert not problemas, '\n'.join(problemas)